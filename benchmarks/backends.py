@@ -0,0 +1,82 @@
+
+"""Compares the time taken to render the same list heavy template translated with the 'elem' and
+'string' backends, and with the 'elem' backend hoisting static tags and attributes into constants.
+
+    python -m benchmarks.backends
+"""
+
+from __future__ import unicode_literals, print_function
+
+import timeit
+
+from packed import translate, to_html, Elem, Markup, Component
+
+
+template = """
+class Price(Component):
+
+    def render(self):
+        return <span class="price">{self.props['amount']}</span>
+
+
+def row(item):
+    return (
+        <tr class="item">
+            <td class="name"><a href={item['url']}>{item['name']}</a></td>
+            <td><Price amount={item['price']} /></td>
+            <td class="status"><i class="icon icon-ok" /> In stock</td>
+        </tr>
+    )
+
+
+def page(items):
+    rows = [row(item) for item in items]
+    return (
+        <table class="items">
+            <thead><tr><th>Name</th><th>Price</th><th>Status</th></tr></thead>
+            <tbody>{rows}</tbody>
+        </table>
+    )
+"""
+
+
+# Name and the options for translate
+variants = [
+    ('elem', {}),
+    ('hoisted', {'hoist': True}),
+    ('string', {'backend': 'string'}),
+]
+
+
+def load(options):
+    namespace = {'Elem': Elem, 'Markup': Markup, 'to_html': to_html, 'Component': Component}
+    exec(translate(template, **options), namespace)
+    return namespace['page']
+
+
+def main(item_count=500, repeat=5, number=20):
+
+    items = [
+        {'url': '/items/{}'.format(index), 'name': 'Item {}'.format(index), 'price': index}
+        for index in range(item_count)
+    ]
+
+    results = {}
+    built = {}
+    for name, options in variants:
+        page = load(options)
+        timer = timeit.Timer(lambda: to_html(page(items)))
+        results[name] = min(timer.repeat(repeat, number)) / number
+        timer = timeit.Timer(lambda: page(items))
+        built[name] = min(timer.repeat(repeat, number)) / number
+        print('{:>7}: {:.2f} ms per page of {} items, {:.2f} ms of it building the page'.format(
+            name, results[name] * 1000, item_count, built[name] * 1000
+        ))
+        assert to_html(page(items)) == to_html(load({})(items))
+
+    print('hoisting speed up building the page: {:.1f}x'.format(built['elem'] / built['hoisted']))
+    print('string backend speed up: {:.1f}x'.format(results['elem'] / results['string']))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""Generates synthetic .pyx code for the benchmarks with a configurable amount and shape of markup.
+"""
+
+from __future__ import unicode_literals, print_function
+
+import io
+import os
+import random
+
+
+def generate(lines=1000, depth=3, attributes=2, density=0.3, seed=0):
+    """Returns roughly the given number of lines of code in Packed syntax made up of functions whose
+    bodies are plain Python or, for the given fraction of the lines, markup. Each markup block nests
+    tags to the given depth and gives each tag the given number of attributes."""
+
+    generator = random.Random(seed)
+    output = []
+    count = 0
+    index = 0
+    while count < lines:
+        output.append('def function_{}(items, value):\n'.format(index))
+        count += 1
+        index += 1
+        if generator.random() < density:
+            block = markup(generator, depth, attributes)
+            output.append(block)
+            count += block.count('\n')
+        else:
+            for line in range(generator.randint(3, 8)):
+                output.append('    value = value * {} + len(items) < {}\n'.format(line, index))
+                count += 1
+            output.append('    return value\n')
+            count += 1
+        output.append('\n\n')
+        count += 2
+
+    return ''.join(output)
+
+
+def markup(generator, depth, attributes):
+    """Returns a return statement with a block of markup nested to the given depth."""
+
+    output = ['    return (\n']
+    for level in range(depth):
+        indent = '    ' * (level + 2)
+        attribute_text = ''.join(
+            ' data{}={}'.format(
+                number, '{value}' if generator.random() < 0.5 else '"text {}"'.format(number)
+            )
+            for number in range(attributes)
+        )
+        output.append('{}<div class="level-{}"{}>Text at level {} with {{value}}\n'.format(
+            indent, level, attribute_text, level
+        ))
+
+    indent = '    ' * (depth + 2)
+    output.append('{}<ul><li>{{items}}</li></ul>\n'.format(indent))
+    output.append('{}<img src="/image.png" />\n'.format(indent))
+
+    for level in reversed(range(depth)):
+        output.append('{}</div>\n'.format('    ' * (level + 2)))
+    output.append('    )\n')
+
+    return ''.join(output)
+
+
+def write(directory, files=10, **options):
+    """Writes the given number of generated .pyx files into the directory, passing the remaining
+    options to generate with a different seed for each file."""
+
+    for index in range(files):
+        path = os.path.join(directory, 'module_{}.pyx'.format(index))
+        with io.open(path, 'w', encoding='utf-8') as pyx_file:
+            pyx_file.write(generate(seed=index, **options))
@@ -0,0 +1,79 @@
+"""Compares the time to_html takes, escaping text and attribute values, with a copy of the renderer
+from before it escaped anything, for pages whose text mostly needs no escaping and for pages where
+all of it does.
+
+    python -m benchmarks.escaping
+"""
+
+from __future__ import unicode_literals, print_function
+
+import timeit
+
+from packed import Elem, Markup, class_types, to_html
+
+
+def unescaped_to_html(entity):
+    """The renderer from before escaping, kept for comparison."""
+
+    parts = []
+    stack = [entity]
+    while stack:
+        entity = stack.pop()
+        if type(entity) is unicode:
+            parts.append(entity)
+        elif isinstance(entity, Elem):
+            if isinstance(entity.name, class_types):
+                stack.append(entity.name(**entity.attributes).render())
+                continue
+            stack.append('</{name}>'.format(name=entity.name))
+            stack.extend(reversed(entity.children))
+            attribute_text = ''.join(
+                ' {}="{}"'.format(key, value) for key, value in entity.attributes.iteritems()
+            )
+            parts.append('<{name}{attributes}>'.format(name=entity.name, attributes=attribute_text))
+        elif isinstance(entity, list):
+            stack.extend(reversed(entity))
+        elif hasattr(entity, 'to_html'):
+            parts.append(entity.to_html())
+        else:
+            parts.append(unicode(entity))
+
+    return ''.join(parts)
+
+
+def page(rows, text):
+    """Returns a table of rows with a link and some text, as it would come from inline code, in
+    each along with a static Markup label."""
+
+    return Elem('table', {'class': 'items'}, [
+        Elem(
+            'tr', {'class': 'row'},
+            Elem('td', {}, Elem('a', {'href': '/items/{}'.format(row)}, text)),
+            Elem('td', {}, Markup('In stock'), ' ', text),
+        )
+        for row in range(rows)
+    ])
+
+
+# Name and the text in each row
+scenarios = [
+    ('clean', 'An ordinary product name'),
+    ('escaped', 'Tom & Jerry\'s <special> "edition"'),
+]
+
+
+def main(rows=2000, repeat=5, number=10):
+
+    for name, text in scenarios:
+        elem = page(rows, text)
+        escaped = min(timeit.Timer(lambda: to_html(elem)).repeat(repeat, number)) / number
+        unescaped = min(
+            timeit.Timer(lambda: unescaped_to_html(elem)).repeat(repeat, number)
+        ) / number
+        print('{:>8}: {:.2f} ms escaping, {:.2f} ms without, {:+.0%} overhead'.format(
+            name, escaped * 1000, unescaped * 1000, escaped / unescaped - 1
+        ))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+"""Compares the cost of importing the Packed runtime with importing the translator, each in a fresh
+interpreter, to show that processes which only run translated code don't pay for the translator.
+
+    python -m benchmarks.imports
+"""
+
+from __future__ import unicode_literals, print_function
+
+import json
+import subprocess
+import sys
+
+
+measure = """
+import json, resource, sys, time
+start = time.time()
+import {module}
+elapsed = time.time() - start
+print(json.dumps({{
+    'time': elapsed,
+    'modules': len(sys.modules),
+    'memory': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+}}))
+"""
+
+
+def measure_import(module, repeat):
+    """Returns the best time, and the module count and peak memory, for importing the module."""
+
+    results = []
+    for run in range(repeat):
+        output = subprocess.check_output([sys.executable, '-c', measure.format(module=module)])
+        results.append(json.loads(output.decode('utf-8')))
+
+    return min(results, key=lambda result: result['time'])
+
+
+def main(repeat=10):
+
+    results = {}
+    for module in ('packed', 'packed.translator'):
+        results[module] = measure_import(module, repeat)
+        print('{:>18}: {:.2f} ms, {} modules loaded, {:.1f} MB peak'.format(
+            module, results[module]['time'] * 1000, results[module]['modules'],
+            results[module]['memory'] / 1024.0
+        ))
+
+    print('runtime import speed up: {:.1f}x'.format(
+        results['packed.translator']['time'] / results['packed']['time']
+    ))
+
+
+if __name__ == '__main__':
+    main()
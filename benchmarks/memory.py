@@ -0,0 +1,80 @@
+"""Compares the memory used per node by Elem with that used by the class it replaced, which had an
+instance dictionary and gave every element without attributes an empty dictionary of its own.
+
+    python -m benchmarks.memory
+"""
+
+from __future__ import unicode_literals, print_function
+
+import multiprocessing
+import resource
+import sys
+
+from packed import Elem
+
+
+class DictElem(object):
+    """Elem before it had slots, kept for comparison."""
+
+    def __init__(self, name, attributes=None, *children):
+
+        self.name = name
+        self.attributes = attributes or {}
+        self.children = children
+
+
+def peak_memory():
+    """Returns the peak resident memory of this process in bytes."""
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes and macOS bytes
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def listing(elem_class, rows):
+    """Returns a table like those of a listing page with four elements in each row, two of them
+    without attributes."""
+
+    attributes = {'class': 'row'}
+    return elem_class('table', attributes, *[
+        elem_class(
+            'tr', attributes,
+            elem_class('td', None, 'Item'),
+            elem_class('td', None, elem_class('a', attributes, 'Details')),
+        )
+        for row in range(rows)
+    ])
+
+
+def run(name, rows, queue):
+    """Runs in a separate process and puts the bytes used per node on the queue."""
+
+    elem_class = {'Elem': Elem, 'DictElem': DictElem}[name]
+    before = peak_memory()
+    table = listing(elem_class, rows)
+    queue.put((peak_memory() - before) / float(rows * 4 + 1))
+    del table
+
+
+def measure(name, rows):
+
+    queue = multiprocessing.Queue()
+    process = multiprocessing.Process(target=run, args=(name, rows, queue))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+
+def main(rows=250000):
+
+    results = {}
+    for name in ('DictElem', 'Elem'):
+        results[name] = measure(name, rows)
+        print('{:>8}: {:.0f} bytes per node'.format(name, results[name]))
+
+    print('memory saved: {:.0%}'.format(1 - results['Elem'] / results['DictElem']))
+
+
+if __name__ == '__main__':
+    main()
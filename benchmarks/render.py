@@ -0,0 +1,129 @@
+"""Compares to_html, which walks the tree with an explicit stack and joins the html once, and
+render_into an io.StringIO with the recursive implementation they replaced, which copies the html of
+each element into that of every element around it, over trees of different depths, fan-outs and
+amounts of text.
+
+    python -m benchmarks.render
+"""
+
+from __future__ import unicode_literals, print_function
+
+import io
+import sys
+import timeit
+
+from packed import (
+    Elem, Component, class_types, escape, format_attribute, to_html, render_into
+)
+
+
+def recursive_to_html(entity):
+    """The recursive to_html from before the explicit stack, kept for comparison. It escapes text as
+    to_html now does so that only the way the tree is walked differs."""
+
+    if isinstance(entity, list):
+        return ''.join(map(recursive_to_html, entity))
+
+    if isinstance(entity, Elem):
+        return recursive_elem_to_html(entity)
+    if hasattr(entity, 'to_html'):
+        return entity.to_html()
+    return escape(entity)
+
+
+def recursive_elem_to_html(elem):
+
+    if isinstance(elem.name, class_types):
+        instance = elem.name(**elem.attributes)
+        return recursive_to_html(instance.render())
+
+    attribute_text = ' '.join(
+        map(lambda item: format_attribute(item[0], item[1]), elem.attributes.iteritems())
+    )
+    if attribute_text:
+        attribute_text = ' ' + attribute_text
+
+    children_text = ''
+    if elem.children:
+        children_text = ''.join(map(recursive_to_html, elem.children))
+    return "<{name}{attributes}>{children}</{name}>".format(
+        name=elem.name,
+        attributes=attribute_text,
+        children=children_text
+    )
+
+
+class Item(Component):
+
+    def render(self):
+        return Elem('li', {'class': 'item'}, self.props['text'])
+
+
+def tree(depth, fan_out, text=10):
+    """Returns a tree of divs nested to the given depth where each div has fan_out children, one of
+    which continues the tree while the others are list items rendered by a component. The leaf
+    and each item hold the given number of characters of text."""
+
+    elem = Elem('span', {}, 'x' * text)
+    for level in range(depth):
+        items = [Elem(Item, {'text': 'x' * text}) for index in range(fan_out - 1)]
+        elem = Elem('div', {'class': 'level'}, elem, *items)
+    return elem
+
+
+def stringio_render_into(elem):
+    return render_into(elem, io.StringIO()).getvalue()
+
+
+# Name, depth, fan-out and characters of text in each leaf of each tree
+scenarios = [
+    ('wide', 3, 20, 10),
+    ('balanced', 50, 4, 10),
+    ('deep', 200, 2, 10),
+    ('wide text', 3, 20, 10000),
+    ('deep text', 200, 2, 10000),
+    ('deeper', 5000, 2, 10),
+    ('deepest', 100000, 1, 10),
+]
+
+
+def measure(function, elem, repeat, number):
+    """Returns the best time for rendering the elem with the function or None if it recursed too
+    deeply."""
+
+    try:
+        function(elem)
+    except RuntimeError:
+        return None
+
+    return min(timeit.Timer(lambda: function(elem)).repeat(repeat, number)) / number
+
+
+def main(repeat=5):
+
+    for name, depth, fan_out, text in scenarios:
+        elem = tree(depth, fan_out, text)
+        # Keep the total number of elements rendered for each measurement similar
+        number = max(1, 20000 // (depth * fan_out))
+
+        stack = measure(to_html, elem, repeat, number)
+        stringio = measure(stringio_render_into, elem, repeat, number)
+        recursive = measure(recursive_to_html, elem, repeat, number)
+        assert to_html(elem) == stringio_render_into(elem)
+        if recursive is not None:
+            assert to_html(elem) == recursive_to_html(elem)
+
+        line = '{:>9} (depth {}, fan-out {}, text {}): {:.2f} ms, render_into {:.2f} ms'.format(
+            name, depth, fan_out, text, stack * 1000, stringio * 1000
+        )
+        if recursive is None:
+            line += ', recursive exceeds the recursion limit of {}'.format(
+                sys.getrecursionlimit()
+            )
+        else:
+            line += ', recursive {:.2f} ms, {:.2f}x'.format(recursive * 1000, recursive / stack)
+        print(line)
+
+
+if __name__ == '__main__':
+    main()
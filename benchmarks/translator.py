@@ -0,0 +1,192 @@
+"""Measures the lines per second and peak memory of translate and of the full main directory walk
+over generated corpora, and compares them against the stored baselines.
+
+    python -m benchmarks.translator
+    python -m benchmarks.translator --save
+    python -m benchmarks.translator deep dense --tolerance 0.5
+
+Each scenario runs in its own process so its peak memory can be read from the resource usage. A
+scenario fails if its lines per second drop, or its peak memory grows, by more than the tolerance
+relative to the baseline. The baselines depend on the machine so save new ones before comparing
+against changes on a different machine.
+"""
+
+from __future__ import unicode_literals, print_function
+
+import argparse
+import io
+import json
+import multiprocessing
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import time
+
+import packed
+from packed import translator
+
+from . import corpus
+
+
+baselines_path = os.path.join(os.path.dirname(__file__), 'baselines.json')
+
+# Name, whether to run main over a directory rather than translate and the options for the corpus
+scenarios = [
+    ('flat', False, dict(lines=20000, depth=1, attributes=1, density=0.3)),
+    ('deep', False, dict(lines=20000, depth=20, attributes=1, density=0.3)),
+    ('attributes', False, dict(lines=20000, depth=3, attributes=12, density=0.3)),
+    ('dense', False, dict(lines=20000, depth=3, attributes=2, density=0.9)),
+    ('sparse', False, dict(lines=20000, depth=3, attributes=2, density=0.05)),
+    ('large', False, dict(lines=200000, depth=3, attributes=2, density=0.3)),
+    ('walk', True, dict(files=40, lines=2000, depth=3, attributes=2, density=0.3)),
+]
+
+
+def peak_memory():
+    """Returns the peak resident memory of this process in bytes."""
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes and macOS bytes
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def measure_translate(options, repeat):
+    """Returns the source lines, the best time and the peak memory of translate for the corpus."""
+
+    code = corpus.generate(**options)
+    lines = code.count('\n')
+    before = peak_memory()
+
+    best = None
+    for run in range(repeat):
+        start = time.time()
+        packed.translate(code)
+        elapsed = time.time() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    return lines, best, peak_memory() - before
+
+
+def measure_walk(options, repeat):
+    """Returns the source lines, the best time and the peak memory of main translating a directory
+    of generated files from scratch."""
+
+    directory = tempfile.mkdtemp()
+    try:
+        corpus.write(directory, **options)
+        lines = options['files'] * options['lines']
+        before = peak_memory()
+
+        best = None
+        stdout = sys.stdout
+        for run in range(repeat):
+            sys.stdout = io.StringIO()
+            start = time.time()
+            try:
+                translator.main(['--no-cache', '--force', directory])
+            finally:
+                sys.stdout = stdout
+            elapsed = time.time() - start
+            best = elapsed if best is None else min(best, elapsed)
+
+        return lines, best, peak_memory() - before
+    finally:
+        shutil.rmtree(directory)
+
+
+def run_scenario(walk, options, repeat, queue):
+    """Runs in a separate process and puts the measurements on the queue."""
+
+    function = measure_walk if walk else measure_translate
+    queue.put(function(options, repeat))
+
+
+def measure(walk, options, repeat):
+    """Returns the lines per second and peak memory for the scenario."""
+
+    queue = multiprocessing.Queue()
+    process = multiprocessing.Process(target=run_scenario, args=(walk, options, repeat, queue))
+    process.start()
+    lines, elapsed, memory = queue.get()
+    process.join()
+
+    return {'lines_per_second': int(lines / elapsed), 'peak_memory': memory}
+
+
+def compare(result, baseline, tolerance):
+    """Returns a list of the ways in which the result has regressed from the baseline."""
+
+    regressions = []
+    if result['lines_per_second'] < baseline['lines_per_second'] * (1 - tolerance):
+        regressions.append('lines per second down from {:.0f}'.format(
+            baseline['lines_per_second']
+        ))
+
+    # Allow a megabyte of noise for scenarios which hardly allocate anything
+    limit = baseline['peak_memory'] * (1 + tolerance) + 1024 * 1024
+    if result['peak_memory'] > limit:
+        regressions.append('peak memory up from {:.1f} MB'.format(
+            baseline['peak_memory'] / 1024.0 / 1024
+        ))
+
+    return regressions
+
+
+def main(args):
+
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.translator')
+    parser.add_argument('scenarios', nargs='*', help='Scenarios to run, defaults to all of them')
+    parser.add_argument('--repeat', type=int, default=5, help='Runs of each scenario')
+    parser.add_argument(
+        '--tolerance', type=float, default=0.3,
+        help='Fraction by which a result may be worse than its baseline'
+    )
+    parser.add_argument('--save', action='store_true', help='Store the results as the baselines')
+    parser.add_argument('--baselines', default=baselines_path, help='Path of the baselines file')
+    arguments = parser.parse_args(args)
+
+    names = [entry[0] for entry in scenarios]
+    for name in arguments.scenarios:
+        if name not in names:
+            parser.error('Unknown scenario: {}'.format(name))
+
+    try:
+        with io.open(arguments.baselines, encoding='utf-8') as baselines_file:
+            baselines = json.load(baselines_file)
+    except IOError:
+        baselines = {}
+
+    failed = False
+    for name, walk, options in scenarios:
+        if arguments.scenarios and name not in arguments.scenarios:
+            continue
+
+        result = measure(walk, options, arguments.repeat)
+        line = '{:>10}: {:>9.0f} lines/s {:>7.1f} MB peak'.format(
+            name, result['lines_per_second'], result['peak_memory'] / 1024.0 / 1024
+        )
+
+        if arguments.save:
+            baselines[name] = result
+        elif name in baselines:
+            regressions = compare(result, baselines[name], arguments.tolerance)
+            if regressions:
+                failed = True
+                line += '  FAILED: ' + ', '.join(regressions)
+        else:
+            line += '  (no baseline)'
+
+        print(line)
+
+    if arguments.save:
+        with io.open(arguments.baselines, 'w', encoding='utf-8') as baselines_file:
+            text = json.dumps(baselines, indent=2, separators=(',', ': '), sort_keys=True)
+            baselines_file.write('{}\n'.format(text))
+
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
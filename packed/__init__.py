@@ -0,0 +1,552 @@
+"""Runtime support for code translated from the Packed syntax: Elem, Component, PureComponent,
+Markup, to_html, iter_html, render_into and the @packed decorator. Asynchronous rendering, for
+Python 3.5 and later, is in packed.aio.
+
+The translator lives in packed.translator and is only imported, along with pypeg2, when one of the
+functions below which need it is first called, so processes which only run translated code don't
+pay for it.
+"""
+
+from __future__ import unicode_literals, print_function
+
+import functools
+import types
+
+
+__version__ = '0.2.0'
+
+# What inspect.isclass checks for, as importing inspect would double the time taken to import this
+class_types = (type, types.ClassType) if hasattr(types, 'ClassType') else (type,)
+
+try:
+    text_type = unicode
+    string_types = basestring
+    iteritems = dict.iteritems
+except NameError:
+    text_type = string_types = str
+    iteritems = dict.items
+
+
+def format_attribute(key, value):
+    """Handles the output format for an attribute to the final html"""
+    return '{name}="{value}"'.format(name=key, value=escape(value))
+
+
+def escape(value):
+    """Returns the value as unicode with the characters which are special in HTML text and
+    attribute values replaced by character references. Markup, and other objects with an __html__
+    method, are returned as they are. Text which needs nothing replacing, which is most of it, is
+    only searched rather than copied."""
+
+    if type(value) is text_type:
+        text = value
+    elif hasattr(value, '__html__'):
+        return value.__html__()
+    else:
+        text = text_type(value)
+
+    if '&' in text or '<' in text or '>' in text or '"' in text or "'" in text:
+        return (
+            text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+            .replace('"', '&#34;').replace("'", '&#39;')
+        )
+    return text
+
+
+class Markup(text_type):
+    """A string of HTML which is output as it is rather than escaped. Translating with prerender
+    enabled produces these for tags which can be rendered at translation time. It has the __html__
+    method which other libraries, such as Django and MarkupSafe, use to mark safe strings so theirs
+    are also output as they are."""
+
+    def to_html(self):
+        return self
+
+    def __html__(self):
+        return self
+
+
+def to_html(entity):
+    """Converts entity to output html with the ability to handle Elem instances & unicode and lists
+    of either. The tree is walked with an explicit stack rather than recursion so trees of any depth
+    can be rendered. Text is escaped, unless it is Markup, see escape."""
+
+    return ''.join(html_parts(entity))
+
+
+def html_parts(entity):
+    """Yields the pieces of the html for the entity in document order, rendering components as they
+    are reached."""
+    return walk_html([entity])
+
+
+def walk_html(stack):
+    """Yields the pieces of the html for the entities on the stack, from the last to the first.
+    Elements and lists are expanded on to the stack in place of their contents, so the html is
+    produced by a single loop whatever the depth of the tree. Other objects with a to_html method
+    are rendered by calling it and anything else is escaped."""
+
+    while stack:
+        entity = stack.pop()
+        if type(entity) is Markup:
+            yield entity
+        elif type(entity) is text_type:
+            yield escape(entity)
+        elif type(entity) is Elem or isinstance(entity, Elem) and not overrides_to_html(entity):
+            part = entity.expand(stack)
+            if part is not None:
+                yield part
+        elif isinstance(entity, list):
+            stack.extend(reversed(entity))
+        elif hasattr(entity, 'to_html'):
+            yield entity.to_html()
+        else:
+            # Assume unicode string or compatible
+            yield escape(entity)
+
+
+def overrides_to_html(elem):
+    """Returns whether the element belongs to a subclass of Elem with its own to_html method."""
+    to_html = type(elem).to_html
+    return getattr(to_html, '__func__', to_html) is not elem_to_html
+
+
+def render_into(entity, buffer):
+    """Writes the html for the entity into the buffer, either a list to append the pieces to or a
+    file-like object, such as an io.StringIO or a response, with a write method which accepts
+    unicode. Each piece of html is written once rather than being copied into the html of every
+    element around it, so any joining happens once at the end. Returns the buffer."""
+    return write_parts(html_parts(entity), buffer)
+
+
+def write_parts(parts, buffer):
+    """Appends or writes each of the parts to the buffer and returns it. See render_into."""
+
+    write = buffer.append if isinstance(buffer, list) else buffer.write
+    for part in parts:
+        write(part)
+    return buffer
+
+
+def iter_html(entity, chunk_size=8192):
+    """Yields the html which to_html returns for the entity in chunks, so that the start of a large
+    page can be sent while the rest is rendered. The pieces of html are gathered until there are at
+    least chunk_size characters, so every chunk but the last is at least that long and a chunk_size
+    of 0 yields each piece as soon as it is rendered."""
+
+    chunk = []
+    size = 0
+    for part in html_parts(entity):
+        chunk.append(part)
+        size += len(part)
+        if size >= chunk_size:
+            yield ''.join(chunk)
+            chunk = []
+            size = 0
+
+    if chunk:
+        yield ''.join(chunk)
+
+
+class EmptyAttributes(dict):
+    """The attributes of every element created without any. It is shared rather than each element
+    having an empty dictionary of its own, so it can't be modified."""
+
+    def immutable(self, *args, **kwargs):
+        raise TypeError('The attributes of an element created without any cannot be modified')
+
+    __setitem__ = __delitem__ = clear = pop = popitem = setdefault = update = immutable
+
+
+no_attributes = EmptyAttributes()
+
+# The names of the HTML elements, so that an element whose name was built at runtime shares the
+# name's string with every other element of the same name
+tag_names = dict((name, name) for name in """
+    a abbr address area article aside audio b base bdi bdo blockquote body br button canvas caption
+    cite code col colgroup data datalist dd del details dfn dialog div dl dt em embed fieldset
+    figcaption figure footer form h1 h2 h3 h4 h5 h6 head header hr html i iframe img input ins kbd
+    label legend li link main map mark meta meter nav noscript object ol optgroup option output p
+    param picture pre progress q rp rt ruby s samp script section select small source span strong
+    style sub summary sup table tbody td template textarea tfoot th thead time title tr track u ul
+    var video wbr
+""".split())
+
+# The closing tags of the HTML elements, made once rather than for every element rendered
+closing_tags = dict((name, Markup('</{name}>'.format(name=name))) for name in tag_names)
+
+
+class Elem(object):
+    """Represents an HTML element. Packed translates the <a></a> into Elem('a') with an optional
+    dictionary argument for attributes and further arguments being children.
+
+    Provides a to_html method for outputting the final html. The attributes and children are never
+    modified, so code translated with hoist can share instances, and attribute dictionaries, between
+    renders. Pages can have a great many elements so they are kept small: there is no instance
+    dictionary, elements without attributes share no_attributes and the names of HTML elements are
+    interned through tag_names.
+    """
+
+    __slots__ = ('name', 'attributes', 'children')
+
+    # Translated code refers to Markup through Elem, which it always imports, for the text written
+    # in the markup which is HTML already
+    Markup = Markup
+
+    def __init__(self, name, attributes=None, *children):
+
+        self.name = tag_names.get(name, name)
+        self.attributes = attributes or no_attributes
+        self.children = children
+
+    def to_html(self):
+        return ''.join(self.html_parts())
+
+    def iter_html(self, chunk_size=8192):
+        """Yields the html in chunks. See iter_html."""
+        return iter_html(self, chunk_size)
+
+    def render_into(self, buffer):
+        """Writes the html into the buffer and returns it. See render_into."""
+        return write_parts(self.html_parts(), buffer)
+
+    def html_parts(self):
+        """Yields the pieces of the html in document order. See html_parts."""
+
+        stack = []
+        part = self.expand(stack)
+        if part is not None:
+            yield part
+        for part in walk_html(stack):
+            yield part
+
+    def expand(self, stack):
+        """Pushes what follows the opening tag, the children and the closing tag, on to the stack
+        for walk_html and returns the opening tag. A component is instead instantiated and the
+        output of its render method pushed in its place, and None returned."""
+
+        # Handle components by instanciating them and calling their render method
+        if isinstance(self.name, class_types):
+            assert not self.children
+            if issubclass(self.name, PureComponent):
+                stack.append(self.name.render_cache().render(self.name, self.attributes))
+                return None
+            stack.append(rendered(self.name, self.name(**self.attributes).render()))
+            return None
+
+        closing_tag = closing_tags.get(self.name)
+        if closing_tag is None:
+            closing_tag = Markup('</{name}>'.format(name=self.name))
+        stack.append(closing_tag)
+        stack.extend(reversed(self.children))
+
+        if not self.attributes:
+            return '<{name}>'.format(name=self.name)
+
+        attribute_text = ' '.join(
+            format_attribute(key, value) for key, value in iteritems(self.attributes)
+        )
+        return '<{name} {attributes}>'.format(name=self.name, attributes=attribute_text)
+
+
+# The function of Elem.to_html, which is an unbound method on Python 2, for overrides_to_html
+elem_to_html = getattr(Elem.to_html, '__func__', Elem.to_html)
+
+
+def rendered(component, output):
+    """Returns the output of the component's render method, raising TypeError if it is a coroutine
+    as those can only be rendered by to_html_async."""
+
+    if hasattr(output, '__await__'):
+        # Closed so that it isn't also reported as never awaited
+        getattr(output, 'close', lambda: None)()
+        raise TypeError(
+            'The render method of {} is a coroutine, render with packed.to_html_async'
+            .format(component.__name__)
+        )
+    return output
+
+
+class Component(object):
+    """Simple component base class that exposes all incoming attributes in a self.props dictionary a
+    little like the React components' this.props attribute.
+    """
+
+    def __init__(self, **props):
+        self.props = props
+
+    def render(self):
+        raise NotImplementedError
+
+
+class PureComponent(Component):
+    """Component whose render method depends on nothing but its props. The html rendered for each
+    set of props is kept in a RenderCache for the class, of up to cache_size entries, so a component
+    used again with the same props costs a dictionary lookup rather than being instantiated and
+    rendered. Props which can't be hashed, such as lists, or which hold markup, such as Elem
+    instances, are rendered every time.
+    """
+
+    cache_size = 1024
+
+    @classmethod
+    def render_cache(cls):
+        """Returns the RenderCache of this class, creating it when first used."""
+
+        cache = cls.__dict__.get('cached_html')
+        if cache is None:
+            cache = RenderCache(cls.cache_size)
+            cls.cached_html = cache
+        return cache
+
+
+class RenderCache(object):
+    """Least recently used cache of rendered html, such as that of a component for each set of its
+    props or of a function decorated with @packed(cache=...) for its arguments. Entries expire after
+    ttl seconds if it is given. It counts the hits and misses and entries can be invalidated or all
+    cleared. Keys which can't be hashed are never cached."""
+
+    def __init__(self, size=1024, ttl=None, timer=None):
+
+        # Imported here so that importing the runtime doesn't pay for them unless this is used
+        import collections
+        import threading
+        import time
+
+        self.size = size
+        self.ttl = ttl
+        self.timer = timer or time.time
+        self.entries = collections.OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(props):
+        """Returns the key for the props of a component, or None if they can't be hashed. The type
+        of each value is part of the key, as values such as 1, 1.0 and True are equal but render
+        differently. Props holding markup, Elem instances or lists, are treated as unhashable too as
+        elements hash by identity, so they would never be found again but would fill the cache."""
+        if any(isinstance(value, (Elem, list)) for value in props.values()):
+            return None
+        try:
+            return hashable(frozenset(
+                (name, type(value), value) for name, value in iteritems(props)
+            ))
+        except TypeError:
+            return None
+
+    def get(self, key):
+        """Returns the html for the key, or None if it isn't cached or has expired."""
+
+        key = hashable(key)
+        with self.lock:
+            entry = self.entries.pop(key, None) if key is not None else None
+            if entry is not None and (entry[1] is None or entry[1] > self.timer()):
+                self.entries[key] = entry
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+
+        return None
+
+    def set(self, key, html):
+        """Caches the html for the key, evicting the least recently used entries if it is full."""
+
+        key = hashable(key)
+        if key is None:
+            return
+
+        expires = self.timer() + self.ttl if self.ttl is not None else None
+        with self.lock:
+            self.entries[key] = (html, expires)
+            while len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+
+    def discard(self, key):
+        """Removes the html for the key and returns whether it was cached."""
+        key = hashable(key)
+        with self.lock:
+            return key is not None and self.entries.pop(key, None) is not None
+
+    def render(self, component, props):
+        """Returns the html for the component class rendered with the props, from the cache if it
+        is there."""
+
+        key = self.key(props)
+        html = self.get(key)
+        if html is None:
+            html = Markup(to_html(rendered(component, component(**props).render())))
+            self.set(key, html)
+        return html
+
+    def invalidate(self, **props):
+        """Removes the html for the props of a component and returns whether it was cached."""
+        return self.discard(self.key(props))
+
+    def clear(self):
+        """Removes all of the cached html and resets the statistics."""
+        with self.lock:
+            self.entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        """Returns the hits, misses and number of entries in a dictionary."""
+        return {'hits': self.hits, 'misses': self.misses, 'entries': len(self.entries)}
+
+
+def hashable(key):
+    """Returns the key, or None if it can't be hashed."""
+    try:
+        hash(key)
+    except TypeError:
+        return None
+    return key
+
+
+def arguments_key(func, cache):
+    """Returns a function which, given the arguments of a call to func, returns the key under which
+    @packed(cache=...) caches the html. See packed."""
+
+    if callable(cache):
+        return cache
+
+    # Imported here as it is slow to import and only needed when decorating
+    import inspect
+
+    names = (cache,) if isinstance(cache, string_types) else cache
+    spec = (getattr(inspect, 'getfullargspec', None) or inspect.getargspec)(func)
+    arguments, varargs, varkw = spec[:3]
+    # A bound method isn't passed its first argument
+    bound = arguments[0] if getattr(func, '__self__', None) is not None else None
+    parameters = set(arguments + [varargs] + getattr(spec, 'kwonlyargs', [])) - set([bound, None])
+
+    if names is not True:
+        # Names which aren't parameters would always have the same value, so every call would share
+        # the html of the first, unless they can be passed as keyword arguments
+        unknown = [name for name in names if name not in parameters]
+        if unknown and varkw is None:
+            raise TypeError('{}() has no arguments named {} to cache by'.format(
+                func.__name__, ', '.join(unknown)
+            ))
+
+    def key(*args, **kwargs):
+        try:
+            values = inspect.getcallargs(func, *args, **kwargs)
+        except TypeError:
+            # The call itself will fail
+            return None
+        values.pop(bound, None)
+        if names is not True:
+            chosen = [
+                values[name] if name in parameters else values[varkw].get(name) for name in names
+            ]
+            return tuple((type(value), value) for value in chosen)
+        try:
+            if varkw is not None:
+                values[varkw] = frozenset(iteritems(values[varkw]))
+            return frozenset((name, type(value), value) for name, value in iteritems(values))
+        except TypeError:
+            return None
+
+    return key
+
+
+def packed(func=None, backend=None, cache=None, ttl=None, cache_size=1024):
+    """Decorator function to apply to functions that need to return rendered html text but look
+    better just returning Elem objects
+
+    It can also be used as @packed(backend='string') to have the translator use that backend for
+    tags within the function. See translate.
+
+    With cache, the html is kept in a RenderCache so that the function is only called again for new
+    arguments, which suits fragments such as headers and navigation bars which rarely change. With
+    cache=True the html is cached for all of the arguments, with an argument name, or a sequence of
+    them, for just those arguments and with a function for the key it returns when called with the
+    arguments. Arguments left out of a call count as their default values. Names which aren't
+    arguments of the function raise TypeError, unless it takes **kwargs, in which they are looked
+    up.
+    The html expires after ttl seconds, if given, and the least recently used is evicted beyond
+    cache_size entries. The decorated function's render_cache attribute holds the cache, for its
+    statistics, and its invalidate method, called with the same arguments as the function, removes
+    the html cached for them.
+    """
+
+    if func is None:
+        return functools.partial(
+            packed, backend=backend, cache=cache, ttl=ttl, cache_size=cache_size
+        )
+
+    if not cache:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            result = func(*args, **kwargs)
+            text = to_html(result)
+            return text
+        return wrapper
+
+    render_cache = RenderCache(cache_size, ttl)
+    key = arguments_key(func, cache)
+
+    @functools.wraps(func)
+    def cached_wrapper(*args, **kwargs):
+        arguments = key(*args, **kwargs)
+        text = render_cache.get(arguments)
+        if text is None:
+            text = to_html(func(*args, **kwargs))
+            render_cache.set(arguments, text)
+        return text
+
+    def invalidate(*args, **kwargs):
+        return render_cache.discard(key(*args, **kwargs))
+
+    cached_wrapper.render_cache = render_cache
+    cached_wrapper.invalidate = invalidate
+    return cached_wrapper
+
+
+def to_html_async(entity, concurrency=100):
+    """Returns a coroutine for the html of the entity, awaiting components whose render methods
+    are coroutines. See packed.aio.to_html_async."""
+    from .aio import to_html_async
+    return to_html_async(entity, concurrency)
+
+
+def translate(code, prerender=False, backend='elem', profile=None, coalesce=False, hoist=False):
+    """Translate code from Packed syntax to valid Python. See packed.translator.translate."""
+    from .translator import translate
+    return translate(code, prerender, backend, profile, coalesce, hoist)
+
+
+def translate_stream(chunks, prerender=False, backend='elem', block_size=64 * 1024, profile=None,
+                     coalesce=False, hoist=False):
+    """Translate code read from an iterable of chunks. See packed.translator.translate_stream."""
+    from .translator import translate_stream
+    return translate_stream(chunks, prerender, backend, block_size, profile, coalesce, hoist)
+
+
+def translate_ast(code, filename='<packed>', prerender=False, backend='elem', coalesce=False,
+                  hoist=False):
+    """Translate code to a Python ast.Module. See packed.translator.translate_ast."""
+    from .translator import translate_ast
+    return translate_ast(code, filename, prerender, backend, coalesce, hoist)
+
+
+def compile_code(code, filename='<packed>', prerender=False, backend='elem', coalesce=False,
+                 hoist=False):
+    """Translate and compile code to a code object. See packed.translator.compile_code."""
+    from .translator import compile_code
+    return compile_code(code, filename, prerender, backend, coalesce, hoist)
+
+
+def install_importer(**options):
+    """Allows .pyx files using the Packed syntax to be imported directly. The options are passed to
+    translate. See packed.importer."""
+    from .importer import install_importer
+    install_importer(**options)
+
+
+def uninstall_importer():
+    from .importer import uninstall_importer
+    uninstall_importer()
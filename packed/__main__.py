@@ -0,0 +1,6 @@
+import sys
+
+from packed.translator import main
+
+
+sys.exit(main(sys.argv[1:]))
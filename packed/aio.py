@@ -0,0 +1,99 @@
+"""Asynchronous rendering, for pages with components whose render methods are coroutines, such as
+those which load their data from a database or a cache. It needs Python 3.5 or later so, unlike the
+rest of the runtime, it isn't imported by the packed package until packed.to_html_async is called.
+"""
+
+import asyncio
+import inspect
+
+from . import Elem, Markup, PureComponent, class_types, escape, overrides_to_html, text_type
+
+
+async def to_html_async(entity, concurrency=100):
+    """Returns the html for the entity, the same as to_html does, awaiting the render methods of
+    components which are coroutines. Each component is rendered as soon as it is reached, so the
+    coroutines of every asynchronous component in the tree, siblings and cousins alike, run
+    concurrently, up to concurrency of them at a time, and a page takes as long as its slowest
+    branch rather than the sum of them all. Components rendered by asynchronous ones are rendered
+    in the same way once their parent's render method returns."""
+
+    semaphore = asyncio.Semaphore(concurrency)
+    return ''.join(await render_parts(entity, semaphore))
+
+
+async def render_parts(entity, semaphore):
+    """Returns a list of the pieces of the html for the entity in document order. The tree is walked
+    as walk_html walks it, except that an asynchronous component is started as a task and its place
+    in the list kept for its html, which is filled in once all of the tasks are gathered."""
+
+    parts = []
+    tasks = []
+    stack = [entity]
+    while stack:
+        entity = stack.pop()
+        if type(entity) is Markup:
+            parts.append(entity)
+        elif type(entity) is text_type:
+            parts.append(escape(entity))
+        elif type(entity) is Elem or isinstance(entity, Elem) and not overrides_to_html(entity):
+            if isinstance(entity.name, class_types):
+                output = render_component(entity, semaphore)
+                if inspect.iscoroutine(output):
+                    tasks.append((len(parts), asyncio.ensure_future(output)))
+                    parts.append(None)
+                else:
+                    stack.append(output)
+                continue
+            part = entity.expand(stack)
+            if part is not None:
+                parts.append(part)
+        elif isinstance(entity, list):
+            stack.extend(reversed(entity))
+        elif hasattr(entity, 'to_html'):
+            parts.append(entity.to_html())
+        else:
+            parts.append(escape(entity))
+
+    if tasks:
+        results = await asyncio.gather(*[task for index, task in tasks])
+        for (index, task), html in zip(tasks, results):
+            parts[index] = html
+
+    return parts
+
+
+def render_component(elem, semaphore):
+    """Returns the output of the element's component or, if its render method is a coroutine, a
+    coroutine for its html. A PureComponent is looked up in its cache first, and the html of an
+    asynchronous one is cached once it is rendered."""
+
+    component = elem.name
+    assert not elem.children
+
+    cache = key = None
+    if issubclass(component, PureComponent):
+        cache = component.render_cache()
+        if not inspect.iscoroutinefunction(component.render):
+            return cache.render(component, elem.attributes)
+        key = cache.key(elem.attributes)
+        html = cache.get(key)
+        if html is not None:
+            return html
+
+    output = component(**elem.attributes).render()
+    if hasattr(output, '__await__'):
+        return render_awaitable(output, semaphore, cache, key)
+    return output
+
+
+async def render_awaitable(awaitable, semaphore, cache=None, key=None):
+    """Returns the html of the output of a component's render method, awaiting it while holding the
+    semaphore, and caches it if a cache is given."""
+
+    async with semaphore:
+        output = await awaitable
+
+    html = Markup(''.join(await render_parts(output, semaphore)))
+    if cache is not None:
+        cache.set(key, html)
+    return html
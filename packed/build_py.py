@@ -0,0 +1,162 @@
+"""A build_py command for setup.py which translates the .pyx files in the packages being built, so
+that built distributions and wheels ship the generated .py files, and their compiled bytecode,
+instead of needing the templates to be translated on the hosts they are deployed to::
+
+    from packed.build_py import build_py
+
+    setup(
+        ...
+        cmdclass={'build_py': build_py},
+    )
+
+The translation can be configured with the packed-jobs, packed-no-cache, packed-prerender,
+packed-backend, packed-coalesce and packed-hoist options, on the command line or in the [build_py]
+section of setup.cfg.
+"""
+
+from __future__ import unicode_literals, print_function
+
+import glob
+import multiprocessing
+import os
+import sys
+
+from distutils import log
+from distutils.errors import DistutilsError, DistutilsOptionError
+from distutils.util import byte_compile
+
+try:
+    from setuptools.command.build_py import build_py as base_build_py
+except ImportError:
+    from distutils.command.build_py import build_py as base_build_py
+
+
+def bytecode_path(path, optimize=0):
+    """Returns the path of the compiled bytecode for the module at the path."""
+
+    if sys.version_info[0] < 3:
+        return path + ('o' if optimize else 'c')
+
+    from importlib.util import cache_from_source
+    return cache_from_source(path, optimization=optimize or '')
+
+
+class build_py(base_build_py):
+    """Builds the packages as usual and then translates each .pyx file in them to a .py file in the
+    build directory, using the translation cache and a process per CPU by default, and compiles the
+    results."""
+
+    user_options = base_build_py.user_options + [
+        (str('packed-jobs='), None,
+         'number of processes to translate .pyx files with [default: one per CPU]'),
+        (str('packed-no-cache'), None, 'translate every .pyx file without the translation cache'),
+        (str('packed-prerender'), None, 'render tags to HTML during translation where possible'),
+        (str('packed-backend='), None, "code generated for tags, 'elem' or 'string'"),
+        (str('packed-coalesce'), None, 'merge text children and drop whitespace HTML ignores'),
+        (str('packed-hoist'), None, 'create static tags and attributes once as constants'),
+    ]
+
+    boolean_options = base_build_py.boolean_options + [
+        str('packed-no-cache'), str('packed-prerender'), str('packed-coalesce'), str('packed-hoist')
+    ]
+
+    def initialize_options(self):
+        base_build_py.initialize_options(self)
+        self.packed_jobs = None
+        self.packed_no_cache = 0
+        self.packed_prerender = 0
+        self.packed_backend = None
+        self.packed_coalesce = 0
+        self.packed_hoist = 0
+
+    def finalize_options(self):
+        base_build_py.finalize_options(self)
+
+        try:
+            self.packed_jobs = int(self.packed_jobs or 0) or multiprocessing.cpu_count()
+        except ValueError:
+            raise DistutilsOptionError('packed-jobs must be a number')
+
+        self.packed_backend = self.packed_backend or 'elem'
+        if self.packed_backend not in ('elem', 'string'):
+            raise DistutilsOptionError("packed-backend must be 'elem' or 'string'")
+
+    def run(self):
+        base_build_py.run(self)
+        self.translate_packages()
+
+    def find_templates(self):
+        """Returns a (pyx_path, py_path) tuple for each .pyx file in the packages, where py_path is
+        the module to generate in the build directory."""
+
+        templates = []
+        for package in self.packages or []:
+            package_dir = self.get_package_dir(package)
+            for pyx_path in sorted(glob.glob(os.path.join(package_dir, '*.pyx'))):
+                module = os.path.basename(pyx_path)[:-4]
+                py_path = self.get_module_outfile(self.build_lib, package.split('.'), module)
+                templates.append((pyx_path, py_path))
+
+        return templates
+
+    def translate_packages(self):
+        """Translates the .pyx files with convert_file and compiles the results."""
+
+        from .translator import TranslationCache, convert_files, default_cache_directory
+
+        # Only options which differ from the defaults are passed so they don't affect cache keys
+        options = {}
+        if self.packed_prerender:
+            options['prerender'] = True
+        if self.packed_backend != 'elem':
+            options['backend'] = self.packed_backend
+        if self.packed_coalesce:
+            options['coalesce'] = True
+        if self.packed_hoist:
+            options['hoist'] = True
+
+        cache = None
+        if not self.packed_no_cache:
+            cache = TranslationCache(default_cache_directory())
+
+        tasks = []
+        for pyx_path, py_path in self.find_templates():
+            log.info('translating %s -> %s', pyx_path, os.path.dirname(py_path))
+            self.mkpath(os.path.dirname(py_path))
+            tasks.append((pyx_path, py_path, cache, options, None))
+
+        if self.dry_run or not tasks:
+            return
+
+        errors = convert_files(tasks, self.packed_jobs)
+        failures = [
+            '{} ({})'.format(task[0], error) for task, error in zip(tasks, errors)
+            if error is not None
+        ]
+        if failures:
+            raise DistutilsError('Failed to translate: {}'.format(', '.join(failures)))
+
+        if cache is not None:
+            cache.prune()
+
+        if sys.dont_write_bytecode:
+            self.warn('byte-compiling is disabled, skipping the translated modules')
+            return
+
+        # Always compile, whatever the compile option says, so hosts never compile the templates
+        outputs = [task[1] for task in tasks]
+        prefix = os.path.join(self.build_lib, '')
+        byte_compile(outputs, optimize=0, force=self.force, prefix=prefix)
+        if self.optimize > 0:
+            byte_compile(outputs, optimize=self.optimize, force=self.force, prefix=prefix)
+
+    def get_outputs(self, include_bytecode=1):
+        outputs = base_build_py.get_outputs(self, include_bytecode)
+        for pyx_path, py_path in self.find_templates():
+            outputs.append(py_path)
+            if include_bytecode and not sys.dont_write_bytecode:
+                outputs.append(bytecode_path(py_path))
+                if self.optimize > 0:
+                    outputs.append(bytecode_path(py_path, self.optimize))
+
+        return outputs
@@ -0,0 +1,190 @@
+"""The import hook which lets .pyx files using the Packed syntax be imported directly. It only
+imports the translator when a module isn't already compiled in its __pycache__ directory, so
+processes whose modules have all been imported before don't pay for the translator and pypeg2.
+"""
+
+from __future__ import unicode_literals, print_function
+
+import hashlib
+import imp
+import json
+import marshal
+import os
+import pkgutil
+import sys
+import tempfile
+
+from . import __version__
+
+
+class PackedFinder(object):
+    """Finder for sys.path_hooks which imports .pyx files using the Packed syntax directly,
+    translating them in memory instead of needing a separate build step.
+
+    There is one for each directory on the path and, as Python 2 uses nothing else to import from a
+    directory once a path hook claims it, modules are first looked for as the import statement
+    would, so .py files and extension modules, such as those built by Cython from a .pyx file next
+    to them, take precedence and the order of the path is kept. A .pyx file is only looked for when
+    there is nothing else, in a listing of the directory which is read again when its modification
+    time changes.
+    """
+
+    # The options passed to translate, set by install_importer
+    options = {}
+
+    def __init__(self, path):
+        # An empty entry is the current directory
+        if not os.path.isdir(path or os.curdir):
+            raise ImportError('Not a directory: {}'.format(path))
+
+        self.path = path
+        self.mtime = None
+        self.names = frozenset()
+
+    def find_module(self, fullname, path=None):
+        name = fullname.rpartition('.')[2]
+        try:
+            found = imp.find_module(name, [self.path])
+        except ImportError:
+            pass
+        else:
+            return pkgutil.ImpLoader(fullname, *found)
+
+        names = self.listing()
+        if name + '.pyx' in names:
+            return PackedLoader(fullname, os.path.join(self.path, name + '.pyx'), False)
+
+        filename = os.path.join(self.path, name, '__init__.pyx')
+        if name in names and os.path.isfile(filename):
+            return PackedLoader(fullname, filename, True)
+
+        return None
+
+    def listing(self):
+        """Returns the names in the directory, listing it again if it has been modified."""
+
+        try:
+            mtime = os.stat(self.path or os.curdir).st_mtime
+        except OSError:
+            return frozenset()
+
+        if mtime != self.mtime:
+            self.names = frozenset(os.listdir(self.path or os.curdir))
+            self.mtime = mtime
+        return self.names
+
+    def invalidate_caches(self):
+        self.mtime = None
+
+
+class PackedLoader(object):
+    """Loader for a .pyx module found by PackedFinder.
+
+    The compiled code is cached in a __pycache__ directory next to the .pyx file, keyed by a hash
+    of its contents and the Packed version, so later imports skip the translation.
+    """
+
+    def __init__(self, fullname, filename, package):
+        self.fullname = fullname
+        self.filename = filename
+        self.package = package
+        self.options = PackedFinder.options
+
+    def is_package(self, fullname):
+        return self.package
+
+    def get_filename(self, fullname):
+        return self.filename
+
+    def get_source(self, fullname):
+        """Returns the translated Python source for the module."""
+        from .translator import translate
+        return translate(open(self.filename, 'r').read(), **self.options)
+
+    def get_code(self, fullname):
+        filename = self.filename
+        contents = open(filename, 'r').read()
+
+        digest = hashlib.sha1(__version__.encode('utf-8'))
+        digest.update(json.dumps(self.options, sort_keys=True).encode('utf-8'))
+        digest.update(contents if isinstance(contents, bytes) else contents.encode('utf-8'))
+        header = imp.get_magic() + digest.digest()
+
+        directory, basename = os.path.split(filename)
+        cache_path = os.path.join(directory, '__pycache__', basename[:-4] + '.packed.pyc')
+
+        try:
+            cached = open(cache_path, 'rb').read()
+        except IOError:
+            cached = b''
+
+        if cached[:len(header)] == header:
+            return marshal.loads(cached[len(header):])
+
+        # Only imported when there is something to translate, so processes whose modules are all
+        # cached don't import the translator and pypeg2
+        from . import translator
+        code = translator.compile_code(contents, filename, **self.options)
+
+        try:
+            try:
+                os.makedirs(os.path.dirname(cache_path))
+            except OSError:
+                pass
+            handle, temp_path = tempfile.mkstemp(dir=os.path.dirname(cache_path), prefix='.tmp')
+            with os.fdopen(handle, 'wb') as temp_file:
+                temp_file.write(header + marshal.dumps(code))
+            os.rename(temp_path, cache_path)
+        except (IOError, OSError):
+            # The cache is an optimisation so read-only locations are fine
+            pass
+
+        return code
+
+    def load_module(self, fullname):
+        if fullname in sys.modules:
+            return sys.modules[fullname]
+
+        code = self.get_code(fullname)
+
+        module = imp.new_module(fullname)
+        module.__file__ = self.filename
+        module.__loader__ = self
+        if self.package:
+            module.__path__ = [os.path.dirname(self.filename)]
+            module.__package__ = fullname
+        else:
+            module.__package__ = str(fullname.rpartition('.')[0])
+
+        sys.modules[fullname] = module
+        try:
+            exec(code, module.__dict__)
+        except BaseException:
+            del sys.modules[fullname]
+            raise
+
+        return sys.modules[fullname]
+
+
+def install_importer(**options):
+    """Allows .pyx files using the Packed syntax to be imported directly. The options are passed to
+    translate."""
+
+    PackedFinder.options = options
+    if PackedFinder not in sys.path_hooks:
+        sys.path_hooks.append(PackedFinder)
+
+    # Directories already imported from are cached as using the built in import, so the hook
+    # wouldn't be asked about them
+    for entry, finder in list(sys.path_importer_cache.items()):
+        if finder is None:
+            del sys.path_importer_cache[entry]
+
+
+def uninstall_importer():
+    if PackedFinder in sys.path_hooks:
+        sys.path_hooks.remove(PackedFinder)
+
+    for entry, finder in list(sys.path_importer_cache.items()):
+        if isinstance(finder, PackedFinder):
+            del sys.path_importer_cache[entry]
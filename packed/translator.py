@@ -0,0 +1,2077 @@
+
+"""Translates code using the Packed syntax into Python, along with the command line tool and the
+build support which use it. This is only imported when needed so that using the runtime, or
+importing .pyx modules which are already compiled, doesn't import pypeg2.
+"""
+
+from __future__ import unicode_literals, print_function
+
+import argparse
+import ast
+import contextlib
+import ctypes
+import ctypes.util
+import filecmp
+import hashlib
+import json
+import keyword
+import multiprocessing
+import re
+import select
+import shutil
+import struct
+import sys
+import os
+import tempfile
+import time
+import timeit
+
+from pypeg2 import List, name, maybe_some, attr, optional, ignore, Symbol
+
+from . import __version__
+
+
+whitespace = re.compile(r'\s+')
+text = re.compile(r'[^<]+')
+
+
+class Whitespace(object):
+    """Matches one or more whitespace characters"""
+
+    grammar = attr('value', whitespace)
+
+    def compose(self, parser, indent=0):
+        "Compress all whitespace to a single space (' ')"
+        indent_str = indent * parser.indent
+        return "{indent}' '".format(indent=indent_str)
+
+    def prerender(self, parts):
+        parts.append(' ')
+
+
+class Text(object):
+    """Matches text between tags and/or inline code sections."""
+
+    grammar = attr('whitespace', optional(whitespace)), attr('value', re.compile(r'[^<{]+'))
+
+    def compose(self, parser, indent=0):
+        indent_str = indent * parser.indent
+        return "{indent}{text}".format(
+            indent=indent_str,
+            text=text_literal((self.whitespace or '') + self.value)
+        )
+
+    def prerender(self, parts):
+        parts.append((self.whitespace or '') + self.value)
+
+
+class String(object):
+    """Matches a double-quote delimited string."""
+
+    grammar = '"', attr('value', re.compile(r'[^"]*')), '"'
+
+    def compose(self, parser):
+        return text_literal(self.value)
+
+    def prerender(self, parts):
+        parts.append(self.value)
+
+
+class InlineCode(object):
+    """Matches arbitrary Python code within a curly braces."""
+
+    grammar = '{', attr('code', re.compile(r'[^}]*')), '}'
+
+    def compose(self, parser, indent=0):
+        indent_str = indent * parser.indent
+        return "{indent}{code}".format(
+            indent=indent_str,
+            code=self.code
+        )
+
+    def prerender(self, parts):
+        parts.append(self)
+
+
+class Attribute(object):
+    """Matches an attribute formatted as either: key="value" or key={value} to handle strings and
+    inline code in a similar style to JSX.
+    """
+
+    grammar = name(), '=', attr('value', [String, InlineCode])
+
+    def compose(self, parser, indent=0):
+        indent_str = indent * parser.indent
+        return "{indent}'{name}': {value},".format(
+            indent=indent_str,
+            name=self.name,
+            value=self.value.compose(parser)
+        )
+
+    def prerender(self, parts):
+        parts.append(' {}="'.format(self.name))
+        self.value.prerender(parts)
+        parts.append('"')
+
+
+class Attributes(List):
+    """Matches zero or more attributes"""
+
+    grammar = optional(ignore(Whitespace), Attribute, maybe_some(ignore(Whitespace), Attribute))
+
+    def compose(self, parser, followed_by_children, indent):
+        indent_str = indent * parser.indent
+
+        if not len(self):
+            indented_paren = '{indent}{{}},\n'.format(indent=indent_str)
+            return indented_paren if followed_by_children else ''
+
+        if getattr(parser, 'hoisting', False) and static_attributes(self):
+            name = hoist(
+                parser, 'attributes',
+                lambda: self.compose(parser, followed_by_children, 0).rstrip(',\n')
+            )
+            return '{indent}{name},\n'.format(indent=indent_str, name=name)
+
+        text = []
+        text.append('{indent}{{\n'.format(indent=indent_str))
+        for entry in self:
+            if not isinstance(entry, basestring):
+                text.append(entry.compose(parser, indent=indent+1))
+                text.append('\n')
+        text.append('{indent}}},\n'.format(indent=indent_str))
+
+        return ''.join(text)
+
+    def prerender(self, parts):
+        for entry in self:
+            if not isinstance(entry, basestring):
+                entry.prerender(parts)
+
+
+class SelfClosingTag(object):
+    """Matches a self-closing tag and all of its attributes."""
+
+    grammar = '<', name(), attr('attributes', Attributes), ignore(whitespace), '/>'
+
+    def get_name(self):
+        return "'%s'" % self.name
+
+    def compose(self, parser, indent=0, first=False):
+        if renders_html(parser):
+            return compose_prerendered(self, parser, indent, first)
+        return self.compose_elem(parser, indent, first)
+
+    def compose_elem(self, parser, indent=0, first=False):
+        if getattr(parser, 'hoisting', False) and id(self) in parser.static_tags:
+            return hoist_tag(self, parser, indent, first)
+
+        text = []
+
+        indent_str = indent * int(not first) * parser.indent
+        end_indent_str = indent * parser.indent
+        indent_plus_str = (indent + 1) * parser.indent
+
+        has_contents = bool(self.attributes)
+        paren_sep = '\n' if has_contents else ''
+        contents_sep = ',\n' if has_contents else ''
+
+        text.append(
+            "{indent}Elem({paren_sep}{indent_plus}{name}{contents_sep}".format(
+                indent=indent_str,
+                indent_plus=indent_plus_str if has_contents else '',
+                name=self.get_name(),
+                paren_sep=paren_sep,
+                contents_sep=contents_sep,
+            )
+        )
+        text.append(self.attributes.compose(parser, followed_by_children=False, indent=indent+1))
+        text.append(
+            "{indent})".format(
+                indent=end_indent_str if has_contents else '',
+            )
+        )
+
+        return ''.join(text)
+
+    def prerender(self, parts):
+        parts.append('<{}'.format(self.name))
+        self.attributes.prerender(parts)
+        parts.append('></{}>'.format(self.name))
+
+
+class ComponentName(object):
+    """A standard name or symbol beginning with an uppercase letter.
+
+    There are language implications of relying on an upper case letter. It seems reasonable to
+    support another syntax for indicating a component at some point. Perhaps an '!' mark at the
+    start of the name or something similar.
+    """
+
+    grammar = attr('first_letter', re.compile(r'[A-Z]')), attr('rest', optional(Symbol))
+
+    def compose(self):
+        return self.first_letter + (self.rest if self.rest else '')
+
+
+class ComponentTag(SelfClosingTag):
+    """Matches a self closing tag with a name that starts with an uppercase letter. These tags are
+    treating as components and their names are assumed to be Python classes rather than strings.
+    """
+
+    grammar = (
+        '<', attr('name', ComponentName), attr('attributes', Attributes), ignore(whitespace), '/>'
+    )
+
+    def get_name(self):
+        return self.name.compose()
+
+    def compose(self, parser, indent=0, first=False):
+        return self.compose_elem(parser, indent, first)
+
+    def prerender(self, parts):
+        parts.append(self)
+
+
+class PairedTag(object):
+    """Matches an open/close tag pair and all of its attributes and children.
+    """
+
+    @staticmethod
+    def parse(parser, text, pos):
+        result = PairedTag()
+        try:
+            text, _ = parser.parse(text, '<')
+            text, tag = parser.parse(text, Symbol)
+            result.name = tag
+            text, attributes = parser.parse(text, Attributes)
+            result.attributes = attributes
+            text, _ = parser.parse(text, '>')
+            text, children = parser.parse(text, TagChildren)
+            result.children = children
+            text, _ = parser.parse(text, optional(whitespace))
+            text, _ = parser.parse(text, '</')
+            text, _ = parser.parse(text, result.name)
+            text, _ = parser.parse(text, '>')
+        except SyntaxError, e:
+            return text, e
+
+        return text, result
+
+    def compose(self, parser, indent=0, first=False):
+        if renders_html(parser):
+            return compose_prerendered(self, parser, indent, first)
+        return compose_tree(self, parser, indent, first)
+
+    def compose_open(self, parser, indent=0, first=False):
+        """Returns the code which comes before the children of the Elem and that which comes after
+        them, for compose_tree."""
+
+        text = []
+
+        indent_str = indent * int(not first) * parser.indent
+        end_indent_str = indent * parser.indent
+        indent_plus_str = (indent + 1) * parser.indent
+
+        has_children = bool(self.children)
+        has_attributes = bool(self.attributes)
+        has_contents = has_children or has_attributes
+        paren_sep = '\n' if has_contents else ''
+        contents_sep = ',\n' if has_contents else ''
+
+        text.append(
+            "{indent}Elem({paren_sep}{indent_plus}'{name}'{contents_sep}".format(
+                indent=indent_str,
+                indent_plus=indent_plus_str if has_contents else '',
+                name=self.name,
+                paren_sep=paren_sep,
+                contents_sep=contents_sep
+            )
+        )
+        text.append(
+            self.attributes.compose(parser, followed_by_children=has_children, indent=indent+1)
+        )
+        closing = "{indent})".format(indent=end_indent_str if has_contents else '')
+
+        return ''.join(text), closing
+
+    def prerender(self, parts):
+        # The tags within are expanded on to a stack rather than recursed into so that deeply
+        # nested markup doesn't hit the recursion limit
+        stack = [self]
+        while stack:
+            entry = stack.pop()
+            if isinstance(entry, basestring):
+                parts.append(entry)
+            elif isinstance(entry, PairedTag):
+                parts.append('<{}'.format(entry.name))
+                entry.attributes.prerender(parts)
+                parts.append('>')
+                stack.append('</{}>'.format(entry.name))
+                stack.extend(reversed(entry.children))
+            else:
+                entry.prerender(parts)
+
+
+tags = [ComponentTag, PairedTag, SelfClosingTag]
+
+
+# Nesting beyond which the code for tags isn't indented any further, as Python can't compile
+# parentheses nested that deeply anyway, so the code for deep markup doesn't grow quadratically
+max_indent = 100
+
+
+def compose_tree(tag, parser, indent=0, first=False):
+    """Composes a paired tag, and the tags within it, as Elem instances. The tags are expanded on to
+    an explicit stack, as walk_html does when rendering, rather than composed recursively so that
+    deeply nested markup doesn't hit the recursion limit. Each child is followed by a comma and the
+    children by the closing parenthesis of the Elem."""
+
+    text = []
+    stack = [(tag, indent, first)]
+    while stack:
+        entry = stack.pop()
+        if type(entry) is not tuple:
+            text.append(entry)
+            continue
+
+        tag, indent, first = entry
+        if not isinstance(tag, PairedTag):
+            text.append(tag.compose(parser, indent=indent))
+        elif getattr(parser, 'hoisting', False) and id(tag) in parser.static_tags:
+            text.append(hoist_tag(tag, parser, indent, first))
+        else:
+            opening, closing = tag.compose_open(parser, indent, first)
+            text.append(opening)
+            stack.append(closing)
+            for child in reversed(tag.children):
+                stack.append(',\n')
+                stack.append((child, min(indent + 1, max_indent), False))
+
+    return ''.join(text)
+
+
+def string_literal(value):
+    """Returns a single quoted Python string literal for the value."""
+    return "'{}'".format(
+        value.replace('\\', '\\\\').replace("'", "\\'").replace('\n', '\\n').replace('\r', '\\r')
+    )
+
+
+def text_literal(value):
+    """Returns the Python expression for text, or an attribute value, written in the markup. It is
+    HTML already so, if escaping it would change it, it is marked as Markup to be output as is. The
+    text is always within an Elem, so Markup is reached through Elem.Markup rather than relying on
+    the translated code importing it."""
+
+    if '&' in value or '<' in value or '>' in value or '"' in value or "'" in value:
+        return 'Elem.Markup({})'.format(string_literal(value))
+    return string_literal(value)
+
+
+def renders_html(parser):
+    """Returns whether tags should be composed as HTML rather than Elem instances."""
+    return getattr(parser, 'prerender', False) or getattr(parser, 'backend', 'elem') == 'string'
+
+
+def compose_prerendered(tag, parser, indent=0, first=False):
+    """Composes a tag as HTML rendered at translation time. A tag without inline code or components
+    becomes a single Markup string. Otherwise the static HTML around them is merged into as few
+    strings as possible. With the 'string' backend these are joined with the rendered inline code
+    and components into a single Markup string when the code runs. Otherwise they are Markup
+    strings within a list which to_html renders in order.
+    """
+
+    parts = []
+    tag.prerender(parts)
+
+    items = []
+    for part in parts:
+        if isinstance(part, basestring) and items and isinstance(items[-1], basestring):
+            items[-1] += part
+        else:
+            items.append(part)
+
+    indent_str = indent * int(not first) * parser.indent
+    if len(items) == 1:
+        return '{indent}Markup({html})'.format(indent=indent_str, html=string_literal(items[0]))
+
+    if getattr(parser, 'backend', 'elem') == 'string':
+        text = ["{indent}Markup(''.join([\n".format(indent=indent_str)]
+        for item in items:
+            if isinstance(item, basestring):
+                text.append((indent + 1) * parser.indent + string_literal(item))
+            elif isinstance(item, InlineCode):
+                text.append('{indent}to_html({code})'.format(
+                    indent=(indent + 1) * parser.indent,
+                    code=item.code
+                ))
+            else:
+                text.append('{indent}to_html({elem})'.format(
+                    indent=(indent + 1) * parser.indent,
+                    elem=item.compose(parser, indent=indent+1, first=True)
+                ))
+            text.append(',\n')
+        text.append('{indent}]))'.format(indent=indent * parser.indent))
+
+        return ''.join(text)
+
+    text = ['{indent}[\n'.format(indent=indent_str)]
+    for item in items:
+        if isinstance(item, basestring):
+            text.append('{indent}Markup({html})'.format(
+                indent=(indent + 1) * parser.indent,
+                html=string_literal(item)
+            ))
+        else:
+            text.append(item.compose(parser, indent=indent+1))
+        text.append(',\n')
+    text.append('{indent}]'.format(indent=indent * parser.indent))
+
+    return ''.join(text)
+
+
+def static_attributes(attributes):
+    """Returns whether all of the attributes have string values."""
+    return all(
+        isinstance(entry.value, String) for entry in attributes
+        if not isinstance(entry, basestring)
+    )
+
+
+def static_tags(tag):
+    """Returns the ids of the tag, and of the tags within it, which have no inline code or
+    components within them and so always produce the same Elem."""
+
+    static = set()
+    stack = [(tag, False)]
+    while stack:
+        entry, visited = stack.pop()
+        children = getattr(entry, 'children', [])
+        nested = [child for child in children if isinstance(child, (SelfClosingTag, PairedTag))]
+        if not visited:
+            stack.append((entry, True))
+            stack.extend((child, False) for child in nested)
+        elif (
+                not isinstance(entry, ComponentTag) and static_attributes(entry.attributes) and
+                not any(isinstance(child, InlineCode) for child in children) and
+                all(id(child) in static for child in nested)
+        ):
+            static.add(id(entry))
+
+    return static
+
+
+def hoist(parser, kind, compose):
+    """Returns the name of a module level constant holding the value of the code returned by
+    compose, adding its definition to the parser's constants unless it is already defined. The name
+    comes from a hash of the code so identical values share a constant."""
+
+    parser.hoisting = False
+    try:
+        value = compose()
+    finally:
+        parser.hoisting = True
+
+    digest = hashlib.sha1(value if isinstance(value, bytes) else value.encode('utf-8'))
+    name = '_packed_{}_{}'.format(kind, digest.hexdigest()[:12])
+    if name not in parser.defined:
+        parser.defined.add(name)
+        parser.constants.append('{} = {}\n'.format(name, value))
+
+    return name
+
+
+def hoist_tag(tag, parser, indent=0, first=False):
+    """Composes a static tag as a reference to a module level constant holding its Elem."""
+    return '{indent}{name}'.format(
+        indent=indent * int(not first) * parser.indent,
+        name=hoist(parser, 'elem', lambda: tag.compose(parser, first=True))
+    )
+
+
+# Elements whose text is rendered with its whitespace intact
+preformatted_elements = frozenset(['pre', 'textarea', 'script', 'style'])
+
+# Elements laid out as blocks, or not rendered at all, so whitespace beside them isn't visible
+block_elements = frozenset([
+    'address', 'article', 'aside', 'blockquote', 'body', 'br', 'caption', 'col', 'colgroup', 'dd',
+    'details', 'dialog', 'div', 'dl', 'dt', 'fieldset', 'figcaption', 'figure', 'footer', 'form',
+    'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'head', 'header', 'hr', 'html', 'legend', 'li', 'link',
+    'main', 'meta', 'nav', 'ol', 'optgroup', 'option', 'p', 'pre', 'section', 'summary', 'table',
+    'tbody', 'td', 'tfoot', 'th', 'thead', 'title', 'tr', 'ul',
+])
+
+
+def is_block(entry):
+    """Returns whether the entry is a block level element."""
+    return (
+        isinstance(entry, (PairedTag, SelfClosingTag)) and not isinstance(entry, ComponentTag) and
+        entry.name in block_elements
+    )
+
+
+def coalesce_children(tag):
+    """Merges each run of Text and Whitespace children of the tag, and of the tags within it, into
+    a single Text child and collapses the whitespace in it to a single space as browsers do.
+    Whitespace at the start or end of a block level element, or beside one, isn't rendered so it is
+    dropped, along with any children left empty. The children of preformatted elements are left
+    alone.
+    """
+
+    stack = [tag]
+    while stack:
+        tag = stack.pop()
+        if not isinstance(tag, PairedTag) or tag.name in preformatted_elements:
+            continue
+
+        children = TagChildren()
+        run = []
+        for entry in list(tag.children) + [None]:
+            if isinstance(entry, Text):
+                run.append((entry.whitespace or '') + entry.value)
+                continue
+            if isinstance(entry, Whitespace):
+                run.append(entry.value)
+                continue
+
+            if run:
+                value = whitespace.sub(' ', ''.join(run))
+                if is_block(tag) and not children or children and is_block(children[-1]):
+                    value = value.lstrip()
+                if is_block(tag) and entry is None or is_block(entry):
+                    value = value.rstrip()
+                if value:
+                    child = Text()
+                    child.whitespace = None
+                    child.value = value
+                    children.append(child)
+                run = []
+
+            if entry is not None:
+                children.append(entry)
+                stack.append(entry)
+
+        tag.children = children
+
+
+class TagChildren(List):
+    """Matches valid tag children which can be other tags, plain text, {values} or a mix of all
+    three."""
+
+    grammar = maybe_some(tags + [Text, InlineCode, Whitespace])
+
+    def compose(self, parser, indent=0):
+        text = []
+        for entry in self:
+            # Skip pure whitespace
+            text.append(entry.compose(parser, indent=indent))
+            text.append(',\n')
+
+        return ''.join(text)
+
+
+class PackedBlock(List):
+    """Matches multi-line block of Packed syntax where the syntax starts on the first line"""
+
+    grammar = attr('line_start', re.compile(r'[^#<\n]+')), tags
+
+    def compose(self, parser, attr_of=None):
+        text = [self.line_start]
+        indent_text = re.match(r'[ \t]*', self.line_start).group(0)
+        indent = len(indent_text) // len(parser.indent)
+        for entry in self:
+            if isinstance(entry, basestring):
+                text.append(entry)
+            else:
+                text.append(entry.compose(parser, indent=indent, first=True))
+
+        return ''.join(text)
+
+
+class NonPackedLine(List):
+    """Tried after establishing that a line doesn't match the Packed syntax so this can really just
+    match everything else as long as there is a new line so we don't match multiple lines."""
+
+    grammar = attr('content', re.compile('.*')), '\n'
+
+    def compose(self, parser, attr_of=None):
+        return '%s\n' % self.content
+
+
+line_without_newline = re.compile(r'.+')
+
+
+class CodeBlock(List):
+    """Top level grammar representing a block of code, some of which will be Packed syntax and some
+    won't.
+
+    Ideally we would parse the entire Python file with an understanding of all the syntax and an
+    understanding of where it is valid to have Packed syntax however for the moment we just parse is
+    as a block of non-packed-syntax-lines and packed blocks. ie, individual lines with no packed
+    syntax and multi-line blocks with have packed syntax.
+    """
+
+    # line_without_newline accounts for the last line in the code sample which might have content
+    # but no new line at the end
+    grammar = maybe_some([PackedBlock, NonPackedLine, line_without_newline])
+
+    def compose(self, parser, attr_of=None):
+        text = []
+        for entry in self:
+            if isinstance(entry, basestring):
+                text.append(entry)
+            else:
+                text.append(entry.compose(parser))
+
+        return ''.join(text)
+
+
+word = re.compile(r'\w+')
+attribute = re.compile(r'\s+(\w+)=(?:"([^"]*)"|\{([^}]*)\})')
+self_closing_end = re.compile(r'\s+/>')
+inline_code = re.compile(r'\{([^}]*)\}')
+text_value = re.compile(r'[^<{]+')
+line_prefix = re.compile(r'[^#<\n]+')
+line_content = re.compile(r'.*')
+indentation = re.compile(r'[ \t]*')
+
+# A line ending with a colon and the next line give the unit of indentation used for the file
+block_start = re.compile(
+    r'^([ \t]*)\S[^\n]*:[ \t]*(?:#[^\n]*)?\n(?:[ \t]*\n)*([ \t]+)\S', re.MULTILINE
+)
+
+
+def indent_unit(code):
+    """Returns the unit of indentation used by the code or None if there isn't an indented block
+    to tell from."""
+
+    for match in block_start.finditer(code):
+        outer, inner = match.group(1, 2)
+        if len(inner) > len(outer) and inner.startswith(outer):
+            return inner[len(outer):]
+
+    return None
+
+
+# Native strings so that searching byte strings under Python 2 doesn't first decode all of them,
+# and comparing them with a non-ASCII byte doesn't warn that it couldn't be decoded
+newline = str('\n')
+tag_open = str('<')
+tag_close = str('>')
+continuation_characters = tuple(str(char) for char in '([{,\\')
+
+# Characters which start a comment, a string or possibly a tag in the Python code surrounding tags
+interesting = re.compile(r'[#\'"<]')
+single_quoted = {
+    "'": re.compile(r"'[^'\\\n]*(?:\\.[^'\\\n]*)*'", re.DOTALL),
+    '"': re.compile(r'"[^"\\\n]*(?:\\.[^"\\\n]*)*"', re.DOTALL),
+}
+triple_quoted = {
+    "'": re.compile(r"'''[^'\\]*(?:(?:\\.|'(?!''))[^'\\]*)*'''", re.DOTALL),
+    '"': re.compile(r'"""[^"\\]*(?:(?:\\.|"(?!""))[^"\\]*)*"""', re.DOTALL),
+}
+
+backends = ('elem', 'string')
+
+# Selects the backend for the whole file or for a function decorated with @packed(backend=...)
+backend_pragma = re.compile(r'^#\s*packed:\s*backend=(\w+)', re.MULTILINE)
+packed_decorator = re.compile(r'^([ \t]*)@packed\((.*)', re.MULTILINE)
+backend_argument = re.compile(r'backend\s*=\s*[\'"](\w+)[\'"]')
+
+# Lines at which a top level statement starts, and those which continue a decorated definition
+statement_line = re.compile(r'^(?!(?:else|elif|except|finally)\b)[A-Za-z_@]', re.MULTILINE)
+decorated_line = re.compile(r'@|(?:async|class|def)\b')
+
+# Keywords after which an expression starts so a '<' must be a tag rather than a comparison
+expression_keywords = frozenset(keyword.kwlist) - set(['True', 'False', 'None'])
+
+
+class Scanner(object):
+    """Hand-written, single pass replacement for parsing the CodeBlock grammar with pypeg2. The
+    parse method follows the grammar exactly whilst the scan method, used by translate, only looks
+    for tags where Python allows an expression.
+
+    The grammar classes above remain the reference definition of the syntax and are used for the
+    nodes of the resulting tree so that their compose methods produce the output. The scanner
+    matches each regular expression in place rather than slicing the remaining text and it parses
+    nested tags with an explicit stack rather than recursion so deeply nested markup doesn't hit the
+    recursion limit. Tag results are remembered by position so a line which is retried after a
+    failed multi-line tag doesn't parse the same markup again.
+    """
+
+    def __init__(self, code, prerender=False, backend='elem', indent=None, profile=None,
+                 coalesce=False, hoist=False):
+        self.code = code
+        self.prerender = prerender
+        self.coalesce = coalesce
+        self.hoist = hoist
+        self.hoisting = False
+        self.static_tags = set()
+        self.constants = []
+        self.defined = set()
+        self.memo = {}
+        self.scanned = 0
+
+        self.profile = profile
+        if profile is not None:
+            profile.instrument(self)
+
+        if backend not in backends:
+            raise ValueError('Unknown backend: {}'.format(backend))
+
+        # Matches the attribute of pypeg2's Parser which the compose methods use to indent
+        self.indent = indent or indent_unit(code) or '    '
+
+        pragma = backend_pragma.search(code)
+        self.default_backend = pragma.group(1) if pragma else backend
+        self.backend = self.default_backend
+
+    def scan(self, line_map=None, final=True):
+        """Returns the translated code.
+
+        Rather than applying the CodeBlock grammar to every line, this lexes just enough of the
+        surrounding Python to skip comments and strings and to tell a tag from a less-than
+        comparison. Only those positions are handed to the tag parser and everything else is
+        copied through unchanged so the time taken depends on the amount of markup.
+
+        If a line_map list is given, it is filled with the line of the original code for each line
+        of the translated code. Lines produced by a tag refer to the line on which the tag starts.
+
+        With hoist set, the constants for the static parts of tags, see translate, are defined just
+        before the top level statement holding the tags. Tags within a statement which started
+        before the code, as happens for the later blocks of translate_stream, are left as they are.
+
+        Unless final is set, the code is treated as the start of a longer text. The scan then stops
+        at the start of the line holding anything which could continue past the end, such as a tag
+        or a string which hasn't been closed, and scanned is set to the position reached so the
+        rest can be scanned again with more of the text.
+        """
+
+        code = self.code
+        profile = self.profile
+        output = []
+        source_line = 1
+        if line_map is not None:
+            line_map[:] = [1]
+        copied = 0
+        segment = 0
+        operand = False
+        decorated = self.decorated_functions()
+        safe = (0, 0, 0)
+        statement = previous = placed = None
+        hoisted = []
+        defined = set(self.defined)
+        last = ''
+        match = interesting.search(code)
+        while match:
+            pos = match.start()
+            if self.hoist:
+                statement, previous, safe = self.statement_start(
+                    statement, previous, safe, segment, pos, len(output), copied, last
+                )
+            elif not final:
+                safe = self.safe_point(safe, segment, pos, decorated, len(output), copied)
+            operand = self.follows_operand(segment, pos, operand)
+            char = code[pos]
+            if char == '#':
+                end = line_content.match(code, pos).end()
+                if end == len(code) and not final:
+                    break
+            elif char == '<':
+                if profile is not None:
+                    started = profile.timer()
+                result = None if operand else self.parse_tag(pos)
+                if result is None:
+                    if not (final or operand) and (
+                            pos + 1 == len(code) or word.match(code, pos + 1)):
+                        # The tag might only be incomplete
+                        break
+                    end = pos + 1
+                    operand = False
+                else:
+                    tag, end = result
+                    self.backend = self.default_backend
+                    for start, stop, backend in decorated:
+                        if start <= pos < stop:
+                            self.backend = backend
+                    line_begin = code.rfind(newline, 0, pos) + 1
+                    indent_text = indentation.match(code, line_begin).group(0)
+                    indent = len(indent_text) // len(self.indent)
+                    line_from = copied
+                    self.hoisting = statement is not None
+                    if self.hoisting and statement != placed:
+                        # Leave a place for the constants before the statement
+                        output.append(code[copied:statement])
+                        self.constants = []
+                        hoisted.append((len(output), self.constants))
+                        output.append('')
+                        copied = placed = statement
+                    composed = self.compose_tag(tag, indent)
+                    output.append(code[copied:pos])
+                    output.append(composed)
+                    if line_map is not None:
+                        source_line = self.map_lines(
+                            line_map, source_line, code.count(newline, line_from, pos),
+                            composed.count('\n'), code.count(newline, pos, end)
+                        )
+                    copied = end
+                    operand = True
+                if profile is not None:
+                    profile.record_line(code, pos, profile.timer() - started)
+            else:
+                end = self.string_end(pos)
+                if end == len(code) and not final:
+                    break
+                operand = True
+
+            if self.hoist:
+                # The last character of code, other than comments, for statement_start
+                last = code[end - 1] if char != '#' else code[segment:pos].rstrip()[-1:] or last
+            segment = end
+            match = interesting.search(code, end)
+        else:
+            if self.hoist:
+                statement, previous, safe = self.statement_start(
+                    statement, previous, safe, segment, len(code), len(output), copied, last
+                )
+            elif not final:
+                safe = self.safe_point(safe, segment, len(code), decorated, len(output), copied)
+
+        if not final:
+            self.scanned, length, copied = safe
+            del output[length:]
+            output.append(code[copied:self.scanned])
+            hoisted = [entry for entry in hoisted if entry[0] < length]
+            # Only the constants which are kept count as defined for the code scanned after this
+            defined.update(
+                definition.partition(' ')[0] for index, constants in hoisted
+                for definition in constants
+            )
+            self.defined = defined
+        else:
+            self.scanned = len(code)
+            output.append(code[copied:])
+
+        if profile is not None:
+            profile.advance(code, self.scanned)
+
+        if final and line_map is not None:
+            self.map_lines(line_map, source_line, code.count(newline, copied), 0, 0)
+
+        line = start = 0
+        for index, constants in hoisted:
+            output[index] = ''.join(constants) + '\n\n' if constants else ''
+            if line_map is not None:
+                # The constants belong to the line of the statement they are defined before
+                line += sum(part.count(newline) for part in output[start:index])
+                count = output[index].count(newline)
+                line_map[line:line] = [line_map[line]] * count
+                line += count
+                start = index + 1
+
+        return ''.join(output)
+
+    def compose_tag(self, tag, indent):
+        """Returns the code for a tag found by scan."""
+        if self.coalesce:
+            coalesce_children(tag)
+        if self.hoisting:
+            self.static_tags = static_tags(tag)
+        return tag.compose(self, indent=indent, first=True)
+
+    def statement_start(self, statement, previous, safe, segment, pos, length, copied, last):
+        """Returns the (statement, previous, safe) state after looking for top level statements in
+        the code between segment and pos. Statement is the start of the last top level statement,
+        including its decorators, and previous is the start of the last line which began one. When
+        hoisting, scan only stops at the start of a statement, so safe becomes the state there, as
+        for safe_point, so that the constants for the statement can be placed before it. Last is
+        the last character before segment which isn't whitespace or within a comment."""
+
+        code = self.code
+        begin = segment
+        for match in statement_line.finditer(code, segment, pos):
+            start = match.start()
+            before = code[begin:start].rstrip()[-1:] or last
+            begin = start
+            if before in continuation_characters:
+                # Most likely still within the previous statement
+                continue
+            if previous is None or code[previous] != '@' or not decorated_line.match(code, start):
+                statement = start
+            previous = start
+
+        if statement is not None and statement >= segment:
+            safe = (statement, length, copied)
+        return statement, previous, safe
+
+    def safe_point(self, safe, segment, pos, decorated, length, copied):
+        """Returns the (position, output length, copied) state at the start of the last line
+        beginning between segment and pos, where nothing is left open, or the previous safe state
+        if there isn't one. Lines within functions decorated with @packed(backend=...) are avoided
+        so that the rest of the function is still scanned along with its decorator."""
+
+        line_start = self.code.rfind(newline, segment, pos) + 1
+        if line_start and not any(start < line_start <= stop for start, stop, _ in decorated):
+            return line_start, length, copied
+        return safe
+
+    def map_lines(self, line_map, source_line, copied_lines, tag_lines, source_tag_lines):
+        """Extends the line_map for code copied through unchanged followed by a composed tag and
+        returns the line of the original code after them."""
+
+        line_map.extend(range(source_line + 1, source_line + copied_lines + 1))
+        source_line += copied_lines
+        if tag_lines:
+            line_map.extend([source_line] * (tag_lines - 1))
+            line_map.append(source_line + source_tag_lines)
+        return source_line + source_tag_lines
+
+    def decorated_functions(self):
+        """Returns (start, end, backend) for each function decorated with @packed(backend=...)
+        where start and end are the positions of the decorator and the end of the function."""
+
+        code = self.code
+        result = []
+        for match in packed_decorator.finditer(code):
+            argument = backend_argument.search(match.group(2))
+            if not argument:
+                continue
+
+            indent = len(match.group(1))
+            end = line_content.match(code, match.end()).end()
+            in_body = False
+            while end < len(code):
+                line = line_content.match(code, end + 1)
+                stripped = line.group(0).lstrip()
+                if stripped and not stripped.startswith('#'):
+                    line_indent = len(line.group(0)) - len(stripped)
+                    if line_indent > indent:
+                        in_body = True
+                    elif in_body:
+                        break
+                end = line.end()
+
+            result.append((match.start(), end, argument.group(1)))
+
+        return result
+
+    def follows_operand(self, start, end, operand):
+        """Returns whether the code between the given positions ends with an operand, eg. a name,
+        number or closing bracket, in which case a following '<' is a comparison. If there is only
+        whitespace then the provided value for the previous token is returned."""
+
+        text = self.code[start:end].rstrip(' \t\r\n\f\v\\')
+        if not text:
+            return operand
+
+        last = text[-1]
+        if last in ')]}':
+            return True
+        if not (last.isalnum() or last == '_'):
+            return False
+
+        begin = len(text) - 1
+        while begin and (text[begin - 1].isalnum() or text[begin - 1] == '_'):
+            begin -= 1
+
+        return text[begin:] not in expression_keywords
+
+    def string_end(self, pos):
+        """Returns the position after the string literal starting at the given position. An
+        unterminated string runs to the end of the line, or of the code if triple quoted."""
+
+        code = self.code
+        quote = code[pos]
+        if code[pos:pos + 3] == quote * 3:
+            match = triple_quoted[quote].match(code, pos)
+            end = len(code)
+        else:
+            match = single_quoted[quote].match(code, pos)
+            end = line_content.match(code, pos).end()
+
+        return match.end() if match else end
+
+    def parse(self):
+        """Returns the CodeBlock for the whole of the code following the original grammar, which
+        treats every line as a possible start of a tag."""
+
+        code = self.code
+        block = CodeBlock()
+        pos = 0
+        while pos < len(code):
+            match = line_prefix.match(code, pos)
+            if match:
+                result = self.parse_tag(match.end())
+                if result is not None:
+                    packed_block = PackedBlock()
+                    packed_block.line_start = match.group(0)
+                    packed_block.append(result[0])
+                    block.append(packed_block)
+                    pos = result[1]
+                    continue
+
+            match = line_content.match(code, pos)
+            end = match.end()
+            if end < len(code):
+                line = NonPackedLine()
+                line.content = match.group(0)
+                block.append(line)
+                pos = end + 1
+            else:
+                block.append(match.group(0))
+                pos = end
+
+        return block
+
+    def parse_tag(self, start):
+        """Returns a (tag, end) tuple for the tag starting at the given position or None if there
+        isn't a valid tag there."""
+
+        memo = self.memo
+        stack = []
+        pos = start
+        while True:
+            if pos not in memo:
+                result = self.parse_tag_head(pos)
+                if result is not None and isinstance(result[0], PairedTag):
+                    stack.append((pos, result[0]))
+                    pos = result[1]
+                else:
+                    memo[pos] = result
+
+            while stack:
+                tag_start, tag = stack[-1]
+                pos, blocked = self.parse_children(tag.children, pos)
+                if blocked:
+                    # A nested tag needs parsing before the children can continue
+                    break
+
+                stack.pop()
+                end = self.parse_closing_tag(tag.name, pos)
+                memo[tag_start] = (tag, end) if end is not None else None
+                pos = tag_start
+            else:
+                return memo[start]
+
+    def parse_tag_head(self, pos):
+        """Parses the opening part of a tag. Self-closing tags are complete at this point whilst
+        paired tags are returned with empty children for the caller to fill in."""
+
+        code = self.code
+        if code[pos:pos + 1] != '<':
+            return None
+
+        match = word.match(code, pos + 1)
+        if not match:
+            return None
+
+        tag_name = match.group(0)
+        attributes, pos = self.parse_attributes(match.end())
+
+        if code[pos:pos + 1] == tag_close:
+            tag = PairedTag()
+            tag.name = Symbol(tag_name)
+            tag.attributes = attributes
+            tag.children = TagChildren()
+            return tag, pos + 1
+
+        match = self_closing_end.match(code, pos)
+        if not match:
+            return None
+
+        if 'A' <= tag_name[0] <= 'Z':
+            tag = ComponentTag()
+            tag.name = ComponentName()
+            tag.name.first_letter = tag_name[0]
+            tag.name.rest = Symbol(tag_name[1:]) if len(tag_name) > 1 else None
+        else:
+            tag = SelfClosingTag()
+            tag.name = Symbol(tag_name)
+        tag.attributes = attributes
+
+        return tag, match.end()
+
+    def parse_attributes(self, pos):
+        """Returns the Attributes starting at the given position and the position after them."""
+
+        code = self.code
+        attributes = Attributes()
+        match = attribute.match(code, pos)
+        while match:
+            entry = Attribute()
+            entry.name = Symbol(match.group(1))
+            if match.group(2) is not None:
+                entry.value = String()
+                entry.value.value = match.group(2)
+            else:
+                entry.value = InlineCode()
+                entry.value.code = match.group(3)
+            attributes.append(entry)
+            pos = match.end()
+            match = attribute.match(code, pos)
+
+        return attributes, pos
+
+    def parse_children(self, children, pos):
+        """Appends children to the provided list until they stop matching. Returns the position
+        reached and whether we stopped because a nested tag at that position hasn't been parsed
+        yet."""
+
+        code = self.code
+        memo = self.memo
+        while True:
+            if code[pos:pos + 1] == tag_open:
+                if pos not in memo:
+                    return pos, True
+                result = memo[pos]
+                if result is None:
+                    return pos, False
+                children.append(result[0])
+                pos = result[1]
+                continue
+
+            space = whitespace.match(code, pos)
+            match = text_value.match(code, space.end() if space else pos)
+            if match:
+                entry = Text()
+                entry.whitespace = space.group(0) if space else None
+                entry.value = match.group(0)
+                children.append(entry)
+                pos = match.end()
+                continue
+
+            match = inline_code.match(code, pos)
+            if match:
+                entry = InlineCode()
+                entry.code = match.group(1)
+                children.append(entry)
+                pos = match.end()
+                continue
+
+            if space:
+                entry = Whitespace()
+                entry.value = space.group(0)
+                children.append(entry)
+                pos = space.end()
+                continue
+
+            return pos, False
+
+    def parse_closing_tag(self, tag_name, pos):
+        """Returns the position after the closing tag for the given name or None if there isn't
+        one."""
+
+        code = self.code
+        space = whitespace.match(code, pos)
+        if space:
+            pos = space.end()
+
+        if code[pos:pos + 2] != '</':
+            return None
+
+        match = word.match(code, pos + 2)
+        if not match or match.group(0) != tag_name:
+            return None
+
+        pos = match.end()
+        return pos + 1 if code[pos:pos + 1] == tag_close else None
+
+
+class Profile(object):
+    """Collects the time spent translating, broken down by the grammar rules, the files and the
+    lines of code with tags, along with how often each rule was attempted and how often it failed
+    so that the parser had to backtrack. Pass one to translate, translate_stream or build and then
+    read the results with table or as_dict. Times for a rule exclude the rules nested within it.
+
+    The opening of each tag is recorded as PairedTag, SelfClosingTag or ComponentTag, or as Tag
+    when there isn't a tag there, and the end of each PairedTag as ClosingTag. Text, InlineCode and
+    Whitespace are matched as part of TagChildren so only their counts are recorded. Compose is the
+    time spent generating the code for the tags.
+    """
+
+    timer = staticmethod(timeit.default_timer)
+
+    # Scanner methods timed as each rule and whether they fail by returning None
+    rules = [
+        ('parse_tag', 'PackedBlock', True),
+        ('parse_tag_head', 'Tag', True),
+        ('parse_attributes', 'Attributes', False),
+        ('parse_children', 'TagChildren', False),
+        ('parse_closing_tag', 'ClosingTag', True),
+        ('compose_tag', 'Compose', False),
+    ]
+
+    def __init__(self):
+        self.counts = {}
+        self.files = []
+        self.lines = {}
+        self.filename = None
+        self.first_line = 1
+        self.position = (0, 1)
+        self.nested = []
+
+    def instrument(self, scanner):
+        """Replaces the methods of the scanner with ones which record their timings."""
+
+        for method, rule, can_fail in self.rules:
+            setattr(scanner, method, self.timed(rule, getattr(scanner, method), can_fail))
+        self.position = (0, self.first_line)
+
+    def timed(self, rule, function, can_fail):
+
+        def wrapper(*args):
+            if rule == 'TagChildren':
+                children = args[0]
+                before = len(children)
+
+            self.nested.append(0.0)
+            start = self.timer()
+            result = function(*args)
+            elapsed = self.timer() - start
+            nested = self.nested.pop()
+            if self.nested:
+                self.nested[-1] += elapsed
+
+            if rule == 'Tag' and result is not None:
+                self.count(type(result[0]).__name__, elapsed - nested, False)
+            else:
+                self.count(rule, elapsed - nested, can_fail and result is None)
+
+            if rule == 'TagChildren':
+                for child in children[before:]:
+                    if isinstance(child, (Text, InlineCode, Whitespace)):
+                        self.count(type(child).__name__, 0.0, False)
+            return result
+
+        return wrapper
+
+    def count(self, rule, elapsed, failed):
+        entry = self.counts.setdefault(rule, [0.0, 0, 0])
+        entry[0] += elapsed
+        entry[1] += 1
+        entry[2] += failed
+
+    def record_line(self, code, pos, elapsed):
+        """Adds time spent on a tag starting at the position to the line on which it starts."""
+
+        last, line = self.position
+        line += code.count(newline, last, pos)
+        self.position = (pos, line)
+
+        begin = code.rfind(newline, 0, pos) + 1
+        end = line_content.match(code, pos).end()
+        entry = self.lines.setdefault((self.filename, line), [0.0, code[begin:end].strip()])
+        entry[0] += elapsed
+
+    def advance(self, code, end):
+        """Moves past the code which a scanner has finished with."""
+        self.first_line += code.count(newline, 0, end)
+
+    @contextlib.contextmanager
+    def file(self, filename):
+        """Attributes the translations within the block to the file."""
+
+        self.filename = filename
+        self.first_line = 1
+        start = self.timer()
+        try:
+            yield
+        finally:
+            self.files.append((filename, self.first_line - 1, self.timer() - start))
+            self.filename = None
+
+    def slowest_lines(self, count=10):
+        """Returns (time, filename, line, text) for the lines with the slowest tags."""
+
+        lines = [
+            (entry[0], key[0], key[1], entry[1]) for key, entry in self.lines.items()
+        ]
+        return sorted(lines, key=lambda line: -line[0])[:count]
+
+    def as_dict(self):
+        """Returns the results in a form suitable for JSON. Times are in seconds."""
+
+        return {
+            'rules': dict(
+                (rule, {'time': entry[0], 'attempts': entry[1], 'backtracks': entry[2]})
+                for rule, entry in self.counts.items()
+            ),
+            'files': [
+                {'filename': filename, 'lines': lines, 'time': elapsed}
+                for filename, lines, elapsed in self.files
+            ],
+            'slowest_lines': [
+                {'filename': filename, 'line': line, 'time': elapsed, 'text': text}
+                for elapsed, filename, line, text in self.slowest_lines()
+            ],
+        }
+
+    def table(self):
+        """Returns the results formatted as text tables."""
+
+        text = ['{:<16}{:>12}{:>12}{:>12}'.format('Rule', 'Time (ms)', 'Attempts', 'Backtracks')]
+        for rule, entry in sorted(self.counts.items(), key=lambda item: -item[1][0]):
+            text.append('{:<16}{:>12.2f}{:>12}{:>12}'.format(
+                rule, entry[0] * 1000, entry[1], entry[2]
+            ))
+
+        if self.files:
+            text.append('')
+            text.append('{:<40}{:>12}{:>12}'.format('File', 'Lines', 'Time (ms)'))
+            for filename, lines, elapsed in sorted(self.files, key=lambda item: -item[2]):
+                text.append('{:<40}{:>12}{:>12.2f}'.format(filename, lines, elapsed * 1000))
+
+        text.append('')
+        text.append('{:<40}{:>12}  {}'.format('Slowest lines', 'Time (ms)', 'Code'))
+        for elapsed, filename, line, source in self.slowest_lines():
+            location = '{}:{}'.format(filename, line) if filename else 'line {}'.format(line)
+            text.append('{:<40}{:>12.2f}  {}'.format(location, elapsed * 1000, source[:60]))
+
+        return '\n'.join(text)
+
+
+def translate(code, prerender=False, backend='elem', profile=None, coalesce=False, hoist=False):
+    """Translate a single multi-line block of code from Packed syntax to valid Python.
+
+    With prerender, tags are rendered to HTML as far as possible during translation and produce
+    Markup strings, and lists of them around inline code and components, instead of Elem instances.
+    The translated code then needs Markup to be imported along with Elem.
+
+    The 'string' backend goes further and produces code which joins the pre-rendered HTML with the
+    rendered inline code and components straight into a Markup string, so no Elem instances are
+    created except for components. The translated code then needs Markup and to_html to be
+    imported. The backend can also be chosen for a whole file with a '# packed: backend=string'
+    line or for a function by decorating it with @packed(backend='string').
+
+    With coalesce, adjacent text and whitespace children are merged into single strings and
+    whitespace which HTML doesn't render, such as that beside block level elements, is dropped so
+    there are fewer children to render. See coalesce_children.
+
+    With hoist, the Elem instances for tags without inline code or components, and the attribute
+    dictionaries with only string values, are created once as module level constants rather than
+    each time the code around them runs. They are defined before the top level statement which
+    uses them and shared between all of its renders, so they must not be modified.
+
+    The values of inline code are escaped when rendered, unless they are Markup, whereas the text
+    and attribute values written in the markup are output as they are. Those holding characters
+    which escaping would replace, such as '&amp;', become Elem.Markup strings, so they need nothing
+    imported besides Elem.
+
+    If a Profile is given then the time taken by the translation is added to it.
+    """
+
+    return Scanner(code, prerender, backend, profile=profile, coalesce=coalesce, hoist=hoist).scan()
+
+
+def translate_stream(chunks, prerender=False, backend='elem', block_size=64 * 1024, profile=None,
+                     coalesce=False, hoist=False):
+    """Translate code from Packed syntax read incrementally from an iterable of chunks, such as the
+    lines of a file, and yield the translated code as each part of it is complete.
+
+    Chunks are gathered until there is at least block_size of code and the complete lines are then
+    translated. Whatever can't be translated yet, such as a tag which hasn't been closed, is kept
+    and retried once it has doubled in size, so the memory used is bounded by the largest block of
+    markup rather than the size of the file. A '# packed: backend=...' line applies from the block
+    in which it is found. If a Profile is given then the time taken is added to it.
+    """
+
+    pending = []
+    pending_size = 0
+    retry_size = block_size
+    indent = None
+    # The names of the constants defined by hoist in the blocks so far, so they aren't repeated
+    defined = set()
+    for chunk in chunks:
+        pending.append(chunk)
+        pending_size += len(chunk)
+        if pending_size < retry_size:
+            continue
+
+        code = chunk[:0].join(pending)
+        indent = indent or indent_unit(code)
+        scanner = Scanner(code, prerender, backend, indent, profile, coalesce, hoist)
+        scanner.defined = defined
+        text = scanner.scan(final=False)
+        if text:
+            yield text
+        defined = scanner.defined
+
+        pragma = backend_pragma.search(code, 0, scanner.scanned)
+        if pragma and pragma.group(1) in backends:
+            backend = pragma.group(1)
+
+        pending = [code[scanner.scanned:]]
+        pending_size = len(pending[0])
+        retry_size = max(block_size, 2 * pending_size)
+
+    code = pending[0][:0].join(pending) if pending else ''
+    scanner = Scanner(code, prerender, backend, indent, profile, coalesce, hoist)
+    scanner.defined = defined
+    text = scanner.scan()
+    if text:
+        yield text
+
+
+def translate_ast(code, filename='<packed>', prerender=False, backend='elem', coalesce=False,
+                  hoist=False):
+    """Translate code from Packed syntax to a Python ast.Module whose line numbers refer to the
+    original code rather than to the translated source, so tracebacks point at the right lines.
+
+    The tags themselves are translated to several lines of Python so the nodes within them refer
+    to the line on which each tag starts.
+    """
+
+    line_map = []
+    source = Scanner(code, prerender, backend, coalesce=coalesce, hoist=hoist).scan(line_map)
+    if not isinstance(source, bytes):
+        source = source.encode('utf-8')
+
+    tree = ast.parse(source, filename)
+    for node in ast.walk(tree):
+        if 'lineno' in node._attributes:
+            node.lineno = line_map[node.lineno - 1]
+
+    return tree
+
+
+def compile_code(code, filename='<packed>', prerender=False, backend='elem', coalesce=False,
+                 hoist=False):
+    """Translate and compile code in Packed syntax to a code object with the line numbers of the
+    original code."""
+
+    tree = translate_ast(code, filename, prerender, backend, coalesce, hoist)
+    return compile(tree, filename, 'exec', dont_inherit=True)
+
+
+class TranslationCache(object):
+    """Persistent on-disk store of translated code keyed by a hash of the .pyx contents and the
+    Packed version, so unchanged files only cost a hash and a copy however their modification times
+    have changed. Entries are touched when read and the least recently used ones are removed by
+    prune once the total size is above max_size.
+    """
+
+    def __init__(self, directory, max_size=100 * 1024 * 1024):
+        self.directory = directory
+        self.max_size = max_size
+
+    def key(self, contents, options=None):
+        """Returns the key for the contents translated with the given options for translate."""
+        return self.key_chunks([contents], options)
+
+    def key_chunks(self, chunks, options=None):
+        """Returns the key for contents read as an iterable of chunks, such as an open file."""
+
+        digest = hashlib.sha1(__version__.encode('utf-8'))
+        digest.update(json.dumps(options or {}, sort_keys=True).encode('utf-8'))
+        digest.update(b'\0')
+        for chunk in chunks:
+            digest.update(chunk if isinstance(chunk, bytes) else chunk.encode('utf-8'))
+        return digest.hexdigest()
+
+    def get(self, key):
+        """Returns the cached translation for the key or None if there isn't one."""
+
+        entry = self.open(key)
+        if entry is None:
+            return None
+
+        with entry:
+            return entry.read()
+
+    def open(self, key):
+        """Returns the cached translation for the key as an open file or None if there isn't one."""
+
+        path = os.path.join(self.directory, key)
+        try:
+            entry = open(path, 'r')
+            os.utime(path, None)
+        except (IOError, OSError):
+            return None
+
+        return entry
+
+    def set(self, key, contents):
+        """Stores the translation for the key."""
+        self.write(key, [contents])
+
+    def write(self, key, chunks):
+        """Stores the translation for the key from an iterable of chunks. The entry is written to a
+        temporary file and renamed into place so concurrent runs never read a partial entry."""
+
+        try:
+            os.makedirs(self.directory)
+        except OSError:
+            if not os.path.isdir(self.directory):
+                raise
+
+        handle, temp_path = tempfile.mkstemp(dir=self.directory, prefix='.tmp')
+        with os.fdopen(handle, 'w') as temp_file:
+            for chunk in chunks:
+                temp_file.write(chunk)
+        os.rename(temp_path, os.path.join(self.directory, key))
+
+    def prune(self):
+        """Removes the least recently used entries until the cache is no larger than max_size."""
+
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return
+
+        entries = []
+        total = 0
+        for filename in names:
+            path = os.path.join(self.directory, filename)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+
+        entries.sort()
+        for mtime, size, path in entries:
+            if total <= self.max_size:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= size
+
+
+def default_cache_directory():
+    """Returns the PACKED_CACHE_DIR environment variable or a 'packed' directory in the user's
+    cache directory."""
+
+    if os.environ.get('PACKED_CACHE_DIR'):
+        return os.environ['PACKED_CACHE_DIR']
+
+    cache_home = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(cache_home, 'packed')
+
+
+class BuildManifest(object):
+    """Records the size and modification time of each .pyx file when it was last translated, along
+    with its output, so that a rebuild can skip files without reading them and can find outputs
+    whose .pyx file has been removed. Paths are relative to the build directory. Entries recorded
+    by another version of Packed or with other translation options are never current.
+    """
+
+    def __init__(self, path, options=None):
+        self.path = path
+        self.options = options or {}
+        self.entries = {}
+        self.stale = set()
+
+    def load(self):
+        try:
+            data = json.load(open(self.path, 'r'))
+        except (IOError, ValueError):
+            return
+
+        self.entries = data.get('entries', {})
+        if data.get('version') != __version__ or data.get('options', {}) != self.options:
+            self.stale = set(self.entries)
+
+    def save(self):
+        data = {'version': __version__, 'options': self.options, 'entries': self.entries}
+        handle, temp_path = tempfile.mkstemp(dir=os.path.dirname(self.path), prefix='.tmp')
+        with os.fdopen(handle, 'w') as temp_file:
+            json.dump(data, temp_file, indent=1, sort_keys=True)
+        os.rename(temp_path, self.path)
+
+    def is_current(self, source, stat):
+        entry = self.entries.get(source)
+        return (
+            entry is not None and
+            source not in self.stale and
+            entry['mtime'] == stat.st_mtime and
+            entry['size'] == stat.st_size
+        )
+
+    def record(self, source, stat, output):
+        self.entries[source] = {'mtime': stat.st_mtime, 'size': stat.st_size, 'output': output}
+        self.stale.discard(source)
+
+    def discard(self, source):
+        self.entries.pop(source, None)
+        self.stale.discard(source)
+
+
+class BuildReport(object):
+    """Counts of what happened to each file during a build along with the error message for each
+    file which failed."""
+
+    def __init__(self):
+        self.translated = 0
+        self.skipped = 0
+        self.removed = 0
+        self.failures = []
+
+    @property
+    def failed(self):
+        return len(self.failures)
+
+    def summary(self):
+        return '{} translated, {} skipped, {} failed, {} removed'.format(
+            self.translated, self.skipped, self.failed, self.removed
+        )
+
+
+def convert_file(pyx_file, py_path, cache=None, options=None, profile=None):
+    """Reads & translates the provided .pyx file and writes the result to the provided .py file
+    path. If a TranslationCache is provided then it is checked before translating and updated
+    afterwards. The .py file is left untouched if it already has the translated contents. The
+    options are passed to translate.
+
+    The file is translated with translate_stream and written to a temporary file which is renamed
+    into place, so large files are never held in memory and the .py file is never left partially
+    written. If a Profile is given then the translation is recorded in it against the file.
+
+    Returns None on success or a message describing the failure so that failures in worker
+    processes can be reported by the parent.
+    """
+
+    directory, basename = os.path.split(py_path)
+    temp_path = os.path.join(directory, '.{}.{}.tmp'.format(basename, os.getpid()))
+    try:
+        options = options or {}
+        key = None
+        cached = None
+        if cache is not None:
+            with open(pyx_file, 'r') as pyx:
+                key = cache.key_chunks(pyx, options)
+            cached = cache.open(key)
+
+        if cached is not None:
+            with cached, open(temp_path, 'w') as temp_file:
+                shutil.copyfileobj(cached, temp_file)
+        else:
+            with open(pyx_file, 'r') as pyx, open(temp_path, 'w') as temp_file:
+                if profile is not None:
+                    with profile.file(pyx_file):
+                        for chunk in translate_stream(pyx, profile=profile, **options):
+                            temp_file.write(chunk)
+                else:
+                    for chunk in translate_stream(pyx, **options):
+                        temp_file.write(chunk)
+            if cache is not None:
+                with open(temp_path, 'r') as temp_file:
+                    cache.write(key, temp_file)
+
+        if os.path.exists(py_path) and filecmp.cmp(temp_path, py_path, shallow=False):
+            os.remove(temp_path)
+        else:
+            os.rename(temp_path, py_path)
+
+    except (SyntaxError, EnvironmentError, UnicodeError) as error:
+        return '{}: {}'.format(type(error).__name__, error)
+
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+    return None
+
+
+def convert_task(task):
+    """Unpacks the arguments for convert_file when called through a process pool."""
+    return convert_file(*task)
+
+
+def convert_files(tasks, jobs=1):
+    """Runs convert_file with the arguments in each task, spread across a pool of processes when
+    there is more than one job. Returns the result for each task in order."""
+
+    if jobs > 1 and len(tasks) > 1:
+        pool = multiprocessing.Pool(jobs)
+        try:
+            chunksize = max(1, len(tasks) // (jobs * 4))
+            return pool.map(convert_task, tasks, chunksize)
+        finally:
+            pool.close()
+            pool.join()
+
+    return [convert_task(task) for task in tasks]
+
+
+def translate_file(pyx_file, py_path, cache=None, options=None):
+    """Reads & translates the provided .pyx file and writes the result to the provided .py file
+    path, reporting any failure on stderr. Returns True if the translation succeeded."""
+
+    error = convert_file(pyx_file, py_path, cache, options)
+    if error is not None:
+        sys.stderr.write('Failed to convert: %s\n' % pyx_file)
+        return False
+
+    return True
+
+
+def build(directory, cache=None, force=False, jobs=1, options=None, profile=None):
+    """Translates the .pyx files under the directory which have changed since the last build, as
+    recorded in a manifest in the directory, and removes outputs whose .pyx file has gone. With
+    more than one job the translations are spread across a pool of processes. The options are
+    passed to translate. Returns a BuildReport.
+
+    If a Profile is given then the files are all translated in this process and recorded in it.
+    """
+
+    manifest = BuildManifest(os.path.join(directory, '.packed-manifest.json'), options)
+    manifest.load()
+
+    report = BuildReport()
+    sources = set()
+    pending = []
+
+    for root, dirs, files in os.walk(directory):
+
+        # Sort so that the order of work, and so of any reported failures, is deterministic
+        dirs.sort()
+        files.sort()
+
+        for filename in files:
+            if filename.endswith('.pyx'):
+                py_filename = '{}.py'.format(filename[:-4])
+
+                full_pkd_path = os.path.join(root, filename)
+                full_py_path = os.path.join(root, py_filename)
+
+                source = os.path.relpath(full_pkd_path, directory)
+                sources.add(source)
+
+                stat = os.stat(full_pkd_path)
+                if (
+                    not force and
+                    manifest.is_current(source, stat) and
+                    os.path.exists(full_py_path)
+                ):
+                    report.skipped += 1
+                    continue
+
+                pending.append((source, stat, full_pkd_path, full_py_path))
+
+    tasks = [(entry[2], entry[3], cache, options, profile) for entry in pending]
+    errors = convert_files(tasks, jobs if profile is None else 1)
+
+    for (source, stat, pyx_path, py_path), error in zip(pending, errors):
+        if error is None:
+            manifest.record(source, stat, os.path.relpath(py_path, directory))
+            report.translated += 1
+        else:
+            manifest.discard(source)
+            report.failures.append((pyx_path, error))
+
+    for source in set(manifest.entries) - sources:
+        output = os.path.join(directory, manifest.entries[source]['output'])
+        try:
+            os.remove(output)
+            report.removed += 1
+        except OSError:
+            pass
+        manifest.discard(source)
+
+    manifest.save()
+
+    return report
+
+
+def rebuild_files(directory, paths, manifest, cache=None):
+    """Translates the given .pyx files, or removes their outputs if they no longer exist, and
+    updates the manifest to match. The files are translated with the manifest's options. Returns a
+    BuildReport."""
+
+    report = BuildReport()
+
+    for pyx_path in sorted(paths):
+        source = os.path.relpath(pyx_path, directory)
+        py_path = '{}.py'.format(pyx_path[:-4])
+
+        try:
+            stat = os.stat(pyx_path)
+        except OSError:
+            if manifest.entries.pop(source, None) is not None:
+                try:
+                    os.remove(py_path)
+                    report.removed += 1
+                except OSError:
+                    pass
+            continue
+
+        error = convert_file(pyx_path, py_path, cache, manifest.options)
+        if error is None:
+            manifest.record(source, stat, os.path.relpath(py_path, directory))
+            report.translated += 1
+        else:
+            manifest.discard(source)
+            report.failures.append((pyx_path, error))
+
+    return report
+
+
+class PollingWatcher(object):
+    """Finds changed .pyx files by periodically comparing the size and modification time of every
+    .pyx file in the directory."""
+
+    def __init__(self, directory, interval=0.5):
+        self.directory = directory
+        self.interval = interval
+        self.snapshot = self.stat_files()
+
+    def stat_files(self):
+        result = {}
+        for root, dirs, files in os.walk(self.directory):
+            for filename in files:
+                if filename.endswith('.pyx'):
+                    path = os.path.join(root, filename)
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue
+                    result[path] = (stat.st_mtime, stat.st_size)
+        return result
+
+    def changes(self):
+        """Blocks until there are changes and returns the set of .pyx paths which have changed."""
+
+        while True:
+            snapshot = self.stat_files()
+            changed = set(
+                path for path in set(snapshot) | set(self.snapshot)
+                if snapshot.get(path) != self.snapshot.get(path)
+            )
+            self.snapshot = snapshot
+            if changed:
+                return changed
+            time.sleep(self.interval)
+
+    def close(self):
+        pass
+
+
+class InotifyWatcher(object):
+    """Finds changed .pyx files using the Linux inotify API, through ctypes, so changes are seen as
+    soon as they are written without scanning the directory."""
+
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    IN_ISDIR = 0x40000000
+
+    mask = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+
+    event_header = struct.Struct(str('iIII'))
+
+    # Time to wait for further events after the first so that a burst of them, eg. a checkout, is
+    # handled together
+    settle_time = 0.05
+
+    def __init__(self, directory):
+        library = ctypes.util.find_library('c')
+        self.libc = ctypes.CDLL(library, use_errno=True)
+        if not hasattr(self.libc, 'inotify_init'):
+            raise OSError('inotify is not available')
+
+        self.fd = self.libc.inotify_init()
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), 'Failed to initialise inotify')
+
+        self.directories = {}
+        self.add_directory(directory)
+
+    def add_directory(self, directory):
+        """Watches the directory and those beneath it. Returns the .pyx files already in them."""
+
+        found = set()
+        for root, dirs, files in os.walk(directory):
+            encoded = root if isinstance(root, bytes) else root.encode(sys.getfilesystemencoding())
+            descriptor = self.libc.inotify_add_watch(self.fd, encoded, self.mask)
+            if descriptor >= 0:
+                self.directories[descriptor] = root
+            found.update(os.path.join(root, name) for name in files if name.endswith('.pyx'))
+        return found
+
+    def read_events(self):
+        changed = set()
+        data = os.read(self.fd, 64 * 1024)
+        offset = 0
+        while offset < len(data):
+            descriptor, mask, cookie, length = self.event_header.unpack_from(data, offset)
+            offset += self.event_header.size
+            filename = data[offset:offset + length].rstrip(b'\0')
+            offset += length
+
+            root = self.directories.get(descriptor)
+            if root is None or not filename:
+                continue
+
+            if not isinstance(root, bytes):
+                filename = filename.decode(sys.getfilesystemencoding())
+
+            path = os.path.join(root, filename)
+            if mask & self.IN_ISDIR:
+                if mask & (self.IN_CREATE | self.IN_MOVED_TO):
+                    changed.update(self.add_directory(path))
+            elif path.endswith('.pyx'):
+                changed.add(path)
+
+        return changed
+
+    def changes(self):
+        """Blocks until there are changes and returns the set of .pyx paths which have changed."""
+
+        changed = set()
+        while not changed:
+            select.select([self.fd], [], [])
+            changed.update(self.read_events())
+            while select.select([self.fd], [], [], self.settle_time)[0]:
+                changed.update(self.read_events())
+        return changed
+
+    def close(self):
+        os.close(self.fd)
+
+
+def create_watcher(directory):
+    """Returns an InotifyWatcher where the platform supports it, otherwise a PollingWatcher."""
+
+    if sys.platform.startswith('linux'):
+        try:
+            return InotifyWatcher(directory)
+        except (OSError, AttributeError):
+            pass
+
+    return PollingWatcher(directory)
+
+
+def watch(directory, cache=None, watcher=None, options=None):
+    """Translates .pyx files under the directory as they change until interrupted. The options are
+    passed to translate."""
+
+    watcher = watcher or create_watcher(directory)
+    manifest = BuildManifest(os.path.join(directory, '.packed-manifest.json'), options)
+    manifest.load()
+
+    try:
+        while True:
+            report = rebuild_files(directory, watcher.changes(), manifest, cache)
+            manifest.save()
+
+            for path, error in report.failures:
+                sys.stderr.write('Failed to convert: {} ({})\n'.format(path, error))
+            print(report.summary())
+            sys.stdout.flush()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.close()
+
+
+def main(args):
+
+    parser = argparse.ArgumentParser(
+        prog='python -m packed',
+        description='Translates .pyx files using the Packed syntax into .py files.'
+    )
+    parser.add_argument('directory', help='Directory to search recursively for .pyx files')
+    parser.add_argument(
+        '--cache-dir', default=default_cache_directory(),
+        help='Directory for cached translations, defaults to $PACKED_CACHE_DIR or ~/.cache/packed'
+    )
+    parser.add_argument(
+        '--cache-size', type=int, default=100,
+        help='Maximum size of the translation cache in megabytes'
+    )
+    parser.add_argument(
+        '--no-cache', action='store_true', help='Translate every file without using the cache'
+    )
+    parser.add_argument(
+        '--force', action='store_true',
+        help='Translate every file even if it is unchanged since the last build'
+    )
+    parser.add_argument(
+        '-j', '--jobs', type=int, default=1,
+        help='Number of processes to translate with, 0 to use one per CPU'
+    )
+    parser.add_argument(
+        '--watch', action='store_true',
+        help='Keep running after the build and translate .pyx files as they change'
+    )
+    parser.add_argument(
+        '--prerender', action='store_true',
+        help='Render tags to HTML during translation where possible, see translate'
+    )
+    parser.add_argument(
+        '--backend', choices=backends, default='elem',
+        help='Code generated for tags, see translate'
+    )
+    parser.add_argument(
+        '--coalesce', action='store_true',
+        help='Merge text children and drop whitespace HTML does not render, see translate'
+    )
+    parser.add_argument(
+        '--hoist', action='store_true',
+        help='Create static tags and attributes once as module level constants, see translate'
+    )
+    parser.add_argument(
+        '--profile', action='store_true',
+        help='Translate every file without the cache in one process and report where the time went'
+    )
+    parser.add_argument(
+        '--profile-json', metavar='PATH', help='Write the --profile results to PATH as JSON'
+    )
+    arguments = parser.parse_args(args)
+
+    # Only options which differ from the defaults are passed so they don't affect cache keys
+    options = {}
+    if arguments.prerender:
+        options['prerender'] = True
+    if arguments.backend != 'elem':
+        options['backend'] = arguments.backend
+    if arguments.coalesce:
+        options['coalesce'] = True
+    if arguments.hoist:
+        options['hoist'] = True
+
+    profile = Profile() if arguments.profile or arguments.profile_json else None
+
+    cache = None
+    if not arguments.no_cache and profile is None:
+        cache = TranslationCache(arguments.cache_dir, arguments.cache_size * 1024 * 1024)
+
+    # Created before the build so that .pyx files edited while it runs are translated afterwards
+    watcher = create_watcher(arguments.directory) if arguments.watch else None
+
+    jobs = arguments.jobs or multiprocessing.cpu_count()
+    force = arguments.force or profile is not None
+    try:
+        report = build(arguments.directory, cache, force, jobs, options, profile)
+    except BaseException:
+        if watcher is not None:
+            watcher.close()
+        raise
+
+    if cache is not None:
+        cache.prune()
+
+    for path, error in report.failures:
+        sys.stderr.write('Failed to convert: {} ({})\n'.format(path, error))
+
+    print(report.summary())
+
+    if arguments.profile:
+        print('\n{}'.format(profile.table()))
+
+    if arguments.profile_json:
+        with open(arguments.profile_json, 'w') as profile_file:
+            json.dump(profile.as_dict(), profile_file, indent=2, sort_keys=True)
+
+    if arguments.watch:
+        sys.stdout.flush()
+        watch(arguments.directory, cache, watcher, options)
+        return 0
+
+    return 1 if report.failures else 0
@@ -30,7 +30,7 @@ setup(
         'Topic :: Software Development :: Pre-processors',
     ],
     platforms='any',
-    py_modules=['packed'],
+    packages=['packed'],
     include_package_data=True,
     install_requires=open('requirements.txt', 'r').read(),
 )
@@ -0,0 +1,38 @@
+"""Components with asynchronous render methods for test_async. They need Python 3.5 or later so
+they are kept out of the test module, which is also run on Python 2."""
+
+import asyncio
+
+from packed import Elem, Component, PureComponent
+
+
+class Loaded(Component):
+    """Waits for its delay, as if loading its data, and records when it starts and finishes."""
+
+    log = []
+
+    async def render(self):
+        Loaded.log.append(('start', self.props['name']))
+        await asyncio.sleep(self.props.get('delay', 0))
+        Loaded.log.append(('end', self.props['name']))
+        return Elem('li', {'class': self.props['name']}, self.props.get('text', ''))
+
+
+class Outer(Component):
+    """Loads its data and then renders further asynchronous components."""
+
+    async def render(self):
+        await asyncio.sleep(0)
+        return Elem('ul', {}, [
+            Elem(Loaded, {'name': name}) for name in self.props['names']
+        ])
+
+
+class Cached(PureComponent):
+
+    renders = 0
+
+    async def render(self):
+        Cached.renders += 1
+        await asyncio.sleep(0)
+        return Elem('b', {}, self.props['name'])
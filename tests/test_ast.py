@@ -0,0 +1,81 @@
+
+from __future__ import unicode_literals, print_function
+
+import ast
+from unittest import TestCase
+
+from packed import translate, translate_ast, compile_code, Elem, to_html
+
+
+code = """
+def link(url):
+    return <a href={url}>
+        {url}
+    </a>
+
+
+def fail():
+    raise ValueError('fail')
+"""
+
+
+class TestTranslateAst(TestCase):
+
+    def test_module(self):
+
+        tree = translate_ast(code)
+
+        self.assertIsInstance(tree, ast.Module)
+        self.assertEqual([node.lineno for node in tree.body], [2, 8])
+
+    def test_line_after_tag(self):
+
+        tree = translate_ast(code)
+
+        self.assertEqual(tree.body[1].body[0].lineno, 9)
+
+    def test_tag_refers_to_its_first_line(self):
+
+        tree = translate_ast(code)
+
+        self.assertEqual(tree.body[0].body[0].lineno, 3)
+        self.assertEqual(tree.body[0].body[0].value.lineno, 3)
+
+
+class TestCompileCode(TestCase):
+
+    def test_compile(self):
+
+        namespace = {'Elem': Elem}
+        exec(compile_code(code, 'example.pyx'), namespace)
+
+        self.assertEqual(to_html(namespace['link']('/')), '<a href="/"> / </a>')
+
+    def test_line_numbers(self):
+
+        namespace = {}
+        exec(compile_code(code, 'example.pyx'), namespace)
+
+        self.assertEqual(namespace['fail'].__code__.co_filename, 'example.pyx')
+        self.assertEqual(namespace['fail'].__code__.co_firstlineno, 8)
+
+
+class TestIndentation(TestCase):
+
+    def test_tabs(self):
+
+        result = translate("def f():\n\treturn <a><b></b></a>\n")
+
+        self.assertMultiLineEqual(
+            result,
+            "def f():\n\treturn Elem(\n\t\t'a',\n\t\t{},\n\t\tElem('b'),\n\t)\n"
+        )
+
+    def test_two_spaces(self):
+
+        result = translate("def f():\n  return <a><b></b></a>\n")
+
+        self.assertMultiLineEqual(
+            result,
+            "def f():\n  return Elem(\n    'a',\n    {},\n    Elem('b'),\n  )\n"
+        )
@@ -0,0 +1,103 @@
+
+from __future__ import unicode_literals, print_function
+
+import sys
+from unittest import TestCase, skipIf
+
+from packed import Elem, Component, Markup, to_html, to_html_async
+
+if sys.version_info >= (3, 5):
+    import asyncio
+    import time
+
+    from .async_components import Loaded, Outer, Cached
+
+
+class Plain(Component):
+
+    def render(self):
+        return Elem('p', {}, self.props['text'])
+
+
+def run(entity, concurrency=100):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(to_html_async(entity, concurrency))
+    finally:
+        loop.close()
+
+
+@skipIf(sys.version_info < (3, 5), 'Asynchronous rendering needs Python 3.5')
+class TestToHtmlAsync(TestCase):
+
+    def setUp(self):
+        del Loaded.log[:]
+        Cached.renders = 0
+        Cached.render_cache().clear()
+
+    def test_same_html(self):
+
+        page = Elem(
+            'div', {'class': 'page'},
+            Elem(Plain, {'text': '<sync>'}),
+            Markup('<hr>'),
+            [Elem(Loaded, {'name': name, 'text': 'A & B'}) for name in 'abc'],
+            Elem(Outer, {'names': ['d', 'e']}),
+            'end',
+        )
+
+        html = run(page)
+
+        self.assertEqual(html, (
+            '<div class="page"><p>&lt;sync&gt;</p><hr>'
+            '<li class="a">A &amp; B</li><li class="b">A &amp; B</li><li class="c">A &amp; B</li>'
+            '<ul><li class="d"></li><li class="e"></li></ul>end</div>'
+        ))
+
+    def test_sync_components(self):
+
+        page = Elem('div', {}, Elem(Plain, {'text': '<sync>'}), ['a', Markup('<br>')], 1)
+
+        self.assertEqual(run(page), to_html(page))
+
+    def test_concurrent(self):
+
+        page = [Elem(Loaded, {'name': name, 'delay': 0.1}) for name in 'abcde']
+
+        start = time.time()
+        run(page)
+
+        self.assertLess(time.time() - start, 0.3)
+        self.assertEqual([event for event, name in Loaded.log[:5]], ['start'] * 5)
+
+    def test_concurrency_limit(self):
+
+        run([Elem(Loaded, {'name': name, 'delay': 0.01}) for name in 'abcd'], concurrency=2)
+
+        self.assertEqual(Loaded.log[:3], [('start', 'a'), ('start', 'b'), ('end', 'a')])
+
+    def test_pure_component(self):
+
+        page = [Elem(Cached, {'name': 'x'}), Elem(Cached, {'name': 'y'})]
+
+        self.assertEqual(run(page), '<b>x</b><b>y</b>')
+        self.assertEqual(run(page), '<b>x</b><b>y</b>')
+        self.assertEqual(Cached.renders, 2)
+        self.assertEqual(Cached.render_cache().stats()['hits'], 2)
+
+    def test_sync_to_html(self):
+
+        elem = Elem(Loaded, {'name': 'a'})
+
+        with self.assertRaises(TypeError):
+            elem.to_html()
+
+    def test_sync_then_async_pure_component(self):
+
+        elem = Elem(Cached, {'name': 'x'})
+
+        with self.assertRaises(TypeError):
+            elem.to_html()
+
+        self.assertEqual(run(elem), '<b>x</b>')
+        self.assertEqual(Cached.render_cache().stats()['entries'], 1)
@@ -0,0 +1,116 @@
+
+from __future__ import unicode_literals, print_function
+
+from unittest import TestCase
+
+from packed import translate, to_html, Elem, Markup, Component, packed
+
+
+class Badge(Component):
+
+    def render(self):
+        return Elem('span', {'class': 'badge'}, self.props['count'])
+
+
+class TestStringBackend(TestCase):
+
+    def test_string_backend(self):
+
+        code = """
+    return <a href={link}>{title} <Badge count={count} /></a>
+"""
+
+        expected = """
+    return Markup(''.join([
+        '<a href="',
+        to_html(link),
+        '">',
+        to_html(title),
+        ' ',
+        to_html(Elem(
+            Badge,
+            {
+                'count': count,
+            },
+        )),
+        '</a>',
+    ]))
+"""
+
+        result = translate(code, backend='string')
+
+        self.assertMultiLineEqual(expected, result)
+
+    def test_static_tag(self):
+
+        code = "    return <br />\n"
+
+        self.assertEqual(translate(code, backend='string'), "    return Markup('<br></br>')\n")
+
+    def test_unknown_backend(self):
+
+        self.assertRaises(ValueError, translate, 'return <a />', backend='unknown')
+
+    def test_file_pragma(self):
+
+        code = """# packed: backend=string
+    return <b>{x}</b>
+"""
+
+        self.assertIn("Markup(''.join([", translate(code))
+
+    def test_decorator(self):
+
+        code = """
+@packed(backend='string')
+def first(x):
+    return <b>{x}</b>
+
+def second(x):
+    return <b>{x}</b>
+"""
+
+        result = translate(code)
+
+        first, second = result.split('def second')
+        self.assertIn("Markup(''.join([", first)
+        self.assertIn('Elem(', second)
+
+    def test_decorator_with_cache(self):
+
+        code = """
+@packed(cache=('section',), backend='string')
+def nav(section):
+    return <b>{section}</b>
+"""
+
+        self.assertIn("Markup(''.join([", translate(code))
+
+    def test_same_html_as_elem(self):
+
+        code = """
+@packed
+def render(link, title, count):
+    return <div class="card"><a href={link}>{title}</a> <Badge count={count} /></div>
+"""
+        values = {
+            'Elem': Elem, 'Markup': Markup, 'to_html': to_html, 'packed': packed, 'Badge': Badge
+        }
+
+        elem_namespace = dict(values)
+        exec(translate(code), elem_namespace)
+        string_namespace = dict(values)
+        exec(translate(code, backend='string'), string_namespace)
+
+        self.assertEqual(
+            elem_namespace['render']('/home', 'Home', 3),
+            string_namespace['render']('/home', 'Home', 3),
+        )
+
+    def test_decorator_with_arguments(self):
+
+        @packed(backend='string')
+        def render():
+            return Markup('<br></br>')
+
+        self.assertEqual(render(), '<br></br>')
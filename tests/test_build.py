@@ -0,0 +1,118 @@
+
+from __future__ import unicode_literals, print_function
+
+import io
+import os
+import shutil
+import sys
+import tempfile
+from unittest import TestCase
+
+from packed.translator import build, main
+
+
+class TestBuild(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.write('example.pyx', 'return <a></a>\n')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def path(self, filename):
+        return os.path.join(self.directory, filename)
+
+    def write(self, filename, contents):
+        open(self.path(filename), 'w').write(contents)
+
+    def write_broken(self):
+        # Bytes which can't be decoded make the translation fail
+        open(self.path('broken.pyx'), 'wb').write(b'return <a>\xe9</a>\n')
+
+    def test_first_build(self):
+
+        report = build(self.directory)
+
+        self.assertEqual((report.translated, report.skipped, report.failed), (1, 0, 0))
+        self.assertEqual(open(self.path('example.py')).read(), "return Elem('a')\n")
+
+    def test_unchanged_file_is_skipped(self):
+
+        build(self.directory)
+        os.utime(self.path('example.py'), (0, 0))
+
+        report = build(self.directory)
+
+        self.assertEqual((report.translated, report.skipped), (0, 1))
+        self.assertEqual(os.stat(self.path('example.py')).st_mtime, 0)
+
+    def test_changed_file_is_translated(self):
+
+        build(self.directory)
+        self.write('example.pyx', 'return <b></b>\n')
+        os.utime(self.path('example.pyx'), (0, 0))
+
+        report = build(self.directory)
+
+        self.assertEqual((report.translated, report.skipped), (1, 0))
+        self.assertEqual(open(self.path('example.py')).read(), "return Elem('b')\n")
+
+    def test_unchanged_output_is_not_rewritten(self):
+
+        build(self.directory)
+        os.utime(self.path('example.pyx'), (0, 0))
+        os.utime(self.path('example.py'), (0, 0))
+
+        report = build(self.directory)
+
+        self.assertEqual(report.translated, 1)
+        self.assertEqual(os.stat(self.path('example.py')).st_mtime, 0)
+
+    def test_orphaned_output_is_removed(self):
+
+        self.write('other.py', 'unrelated = True\n')
+        build(self.directory)
+        os.remove(self.path('example.pyx'))
+
+        report = build(self.directory)
+
+        self.assertEqual(report.removed, 1)
+        self.assertFalse(os.path.exists(self.path('example.py')))
+        self.assertTrue(os.path.exists(self.path('other.py')))
+
+    def test_failures_are_reported(self):
+
+        self.write_broken()
+
+        report = build(self.directory)
+
+        self.assertEqual((report.translated, report.failed), (1, 1))
+        self.assertEqual(report.failures[0][0], self.path('broken.pyx'))
+
+    def test_parallel_build(self):
+
+        for index in range(10):
+            self.write('example{}.pyx'.format(index), 'return <a>{}</a>\n'.format(index))
+        self.write_broken()
+
+        report = build(self.directory, jobs=3)
+
+        self.assertEqual((report.translated, report.failed), (11, 1))
+        self.assertEqual(
+            open(self.path('example3.py')).read(), "return Elem(\n    'a',\n    {},\n    '3',\n)\n"
+        )
+
+    def test_main_exit_code(self):
+
+        stdout, stderr = sys.stdout, sys.stderr
+        sys.stdout, sys.stderr = io.StringIO(), io.StringIO()
+        try:
+            self.assertEqual(main([self.directory, '--no-cache']), 0)
+            self.write_broken()
+            self.assertEqual(main([self.directory, '--no-cache']), 1)
+            output = sys.stderr.getvalue()
+        finally:
+            sys.stdout, sys.stderr = stdout, stderr
+
+        self.assertIn('Failed to convert: {}'.format(self.path('broken.pyx')), output)
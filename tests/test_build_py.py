@@ -0,0 +1,80 @@
+
+from __future__ import unicode_literals, print_function
+
+import os
+import shutil
+import sys
+import tempfile
+from setuptools.dist import Distribution
+from unittest import TestCase
+
+from packed.build_py import build_py, bytecode_path
+
+
+class TestBuildPy(TestCase):
+
+    def setUp(self):
+        self.dont_write_bytecode = sys.dont_write_bytecode
+        sys.dont_write_bytecode = False
+
+        self.directory = tempfile.mkdtemp()
+        self.source = os.path.join(self.directory, 'src')
+        self.build_lib = os.path.join(self.directory, 'build')
+
+        package = os.path.join(self.source, 'example')
+        os.makedirs(package)
+        open(os.path.join(package, '__init__.py'), 'w').write('')
+        open(os.path.join(package, 'links.pyx'), 'w').write('def link():\n    return <a></a>\n')
+        open(os.path.join(package, 'icons.pyx'), 'w').write('def icon():\n    return <i />\n')
+
+    def tearDown(self):
+        sys.dont_write_bytecode = self.dont_write_bytecode
+        shutil.rmtree(self.directory)
+
+    def create_command(self, **options):
+        distribution = Distribution({
+            'name': 'example',
+            'script_name': 'setup.py',
+            'packages': ['example'],
+            'package_dir': {'': self.source},
+        })
+        command = build_py(distribution)
+        command.build_lib = self.build_lib
+        command.packed_no_cache = 1
+        for option, value in options.items():
+            setattr(command, option, value)
+        command.ensure_finalized()
+        return command
+
+    def test_translates_templates(self):
+
+        self.create_command().run()
+
+        path = os.path.join(self.build_lib, 'example', 'links.py')
+        self.assertEqual(open(path).read(), "def link():\n    return Elem('a')\n")
+        self.assertTrue(os.path.exists(bytecode_path(path)))
+
+    def test_outputs(self):
+
+        command = self.create_command(packed_jobs='2')
+        command.run()
+
+        package = os.path.join(self.build_lib, 'example')
+        outputs = command.get_outputs()
+        self.assertIn(os.path.join(package, '__init__.py'), outputs)
+        for name in ['icons.py', 'links.py']:
+            self.assertIn(os.path.join(package, name), outputs)
+            self.assertIn(bytecode_path(os.path.join(package, name)), outputs)
+
+    def test_backend(self):
+
+        self.create_command(packed_backend='string').run()
+
+        path = os.path.join(self.build_lib, 'example', 'icons.py')
+        self.assertEqual(open(path).read(), "def icon():\n    return Markup('<i></i>')\n")
+
+    def test_failure(self):
+
+        open(os.path.join(self.source, 'example', 'broken.pyx'), 'wb').write(b'<a>\xe9</a>\n')
+
+        self.assertRaises(Exception, self.create_command().run)
@@ -0,0 +1,62 @@
+
+from __future__ import unicode_literals, print_function
+
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+from packed.translator import TranslationCache, translate_file
+
+
+class TestTranslationCache(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.cache = TranslationCache(os.path.join(self.directory, 'cache'))
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_missing(self):
+
+        self.assertIsNone(self.cache.get(self.cache.key('return True')))
+
+    def test_set_and_get(self):
+
+        key = self.cache.key('return <a></a>')
+        self.cache.set(key, "return Elem('a')")
+
+        self.assertEqual(self.cache.get(key), "return Elem('a')")
+
+    def test_key_depends_on_contents(self):
+
+        self.assertEqual(self.cache.key('return <a></a>'), self.cache.key('return <a></a>'))
+        self.assertNotEqual(self.cache.key('return <a></a>'), self.cache.key('return <b></b>'))
+
+    def test_prune_removes_least_recently_used(self):
+
+        self.cache.max_size = 10
+        for index, key in enumerate(['first', 'second', 'third']):
+            self.cache.set(key, '12345')
+            os.utime(os.path.join(self.cache.directory, key), (index, index))
+
+        self.cache.prune()
+
+        self.assertIsNone(self.cache.get('first'))
+        self.assertEqual(self.cache.get('second'), '12345')
+        self.assertEqual(self.cache.get('third'), '12345')
+
+    def test_translate_file_uses_cache(self):
+
+        pyx_path = os.path.join(self.directory, 'example.pyx')
+        py_path = os.path.join(self.directory, 'example.py')
+        open(pyx_path, 'w').write('return <a></a>\n')
+
+        translate_file(pyx_path, py_path, self.cache)
+        self.assertEqual(open(py_path).read(), "return Elem('a')\n")
+
+        # Replace the cached entry to show that the second run doesn't translate
+        self.cache.set(self.cache.key('return <a></a>\n'), 'cached\n')
+        translate_file(pyx_path, py_path, self.cache)
+        self.assertEqual(open(py_path).read(), 'cached\n')
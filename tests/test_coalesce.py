@@ -0,0 +1,126 @@
+
+from __future__ import unicode_literals, print_function
+
+from unittest import TestCase
+
+from packed import translate, to_html, Elem, Markup
+
+
+class TestCoalesce(TestCase):
+
+    def test_merged_text(self):
+
+        code = """
+    return <p>Hello   <b>{name}</b> , welcome
+        back <i>soon</i></p>
+"""
+
+        expected = """
+    return Elem(
+        'p',
+        {},
+        'Hello ',
+        Elem(
+            'b',
+            {},
+            name,
+        ),
+        ' , welcome back ',
+        Elem(
+            'i',
+            {},
+            'soon',
+        ),
+    )
+"""
+
+        result = translate(code, coalesce=True)
+
+        self.assertMultiLineEqual(expected, result)
+
+    def test_block_whitespace(self):
+
+        code = """
+    return <ul>
+        <li> One </li>
+        <li>Two</li>
+    </ul>
+"""
+
+        expected = """
+    return Elem(
+        'ul',
+        {},
+        Elem(
+            'li',
+            {},
+            'One',
+        ),
+        Elem(
+            'li',
+            {},
+            'Two',
+        ),
+    )
+"""
+
+        result = translate(code, coalesce=True)
+
+        self.assertMultiLineEqual(expected, result)
+
+    def test_inline_whitespace(self):
+
+        code = """
+    return <div><span>a</span> <Badge /> {value} </div>
+"""
+
+        expected = """
+    return Elem(
+        'div',
+        {},
+        Elem(
+            'span',
+            {},
+            'a',
+        ),
+        ' ',
+        Elem(Badge),
+        ' ',
+        value,
+    )
+"""
+
+        result = translate(code, coalesce=True)
+
+        self.assertMultiLineEqual(expected, result)
+
+    def test_preformatted(self):
+
+        code = """
+    return <div> <pre>  a   b</pre> </div>
+"""
+
+        expected = """
+    return Markup('<div><pre>  a   b</pre></div>')
+"""
+
+        result = translate(code, prerender=True, coalesce=True)
+
+        self.assertMultiLineEqual(expected, result)
+
+    def test_same_html(self):
+
+        code = """
+    return <section>
+        <h1>Title</h1>
+        <p>Some <em>text</em> {value} here</p>
+    </section>
+"""
+
+        namespace = {'Elem': Elem, 'Markup': Markup, 'value': 'and more'}
+        exec('def render():' + translate(code, coalesce=True), namespace)
+
+        self.assertEqual(
+            to_html(namespace['render']()),
+            '<section><h1>Title</h1><p>Some <em>text</em> and more here</p></section>'
+        )
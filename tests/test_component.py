@@ -3,7 +3,7 @@ from __future__ import unicode_literals, print_function
 
 from unittest import TestCase
 
-from packed import Elem, Component
+from packed import Elem, Component, PureComponent
 
 
 class TestComponent(TestCase):
@@ -46,3 +46,95 @@ class TestComponent(TestCase):
         expected = 'My test property value: test_value'
 
         self.assertEqual(elem.to_html(), expected)
+
+
+class Icon(PureComponent):
+
+    cache_size = 2
+    renders = 0
+
+    def render(self):
+        Icon.renders += 1
+        return Elem('i', {'class': 'icon-' + self.props['name']})
+
+
+class TestPureComponent(TestCase):
+
+    def setUp(self):
+        Icon.renders = 0
+        Icon.render_cache().clear()
+
+    def test_cached(self):
+
+        elem = Elem('p', {}, *[Elem(Icon, {'name': 'ok'}) for index in range(3)])
+
+        expected = '<p>' + '<i class="icon-ok"></i>' * 3 + '</p>'
+
+        self.assertEqual(elem.to_html(), expected)
+        self.assertEqual(Icon.renders, 1)
+        self.assertEqual(Icon.render_cache().stats(), {'hits': 2, 'misses': 1, 'entries': 1})
+
+    def test_least_recently_used(self):
+
+        for name in ['a', 'b', 'a', 'c', 'a', 'b']:
+            Elem(Icon, {'name': name}).to_html()
+
+        # b is evicted by c and rendered again
+        self.assertEqual(Icon.renders, 4)
+        self.assertEqual(Icon.render_cache().stats()['entries'], 2)
+
+    def test_invalidate(self):
+
+        Elem(Icon, {'name': 'ok'}).to_html()
+
+        self.assertTrue(Icon.render_cache().invalidate(name='ok'))
+        self.assertFalse(Icon.render_cache().invalidate(name='ok'))
+
+        Elem(Icon, {'name': 'ok'}).to_html()
+
+        self.assertEqual(Icon.renders, 2)
+
+    def test_unhashable_props(self):
+
+        class Names(PureComponent):
+
+            def render(self):
+                return ', '.join(self.props['names'])
+
+        for index in range(2):
+            self.assertEqual(Elem(Names, {'names': ['a', 'b']}).to_html(), 'a, b')
+
+        self.assertEqual(Names.render_cache().stats(), {'hits': 0, 'misses': 2, 'entries': 0})
+
+    def test_markup_props(self):
+
+        class Card(PureComponent):
+
+            def render(self):
+                return Elem('div', {}, self.props['body'])
+
+        for index in range(5):
+            self.assertEqual(
+                Elem(Card, {'body': Elem('b', {}, 'same')}).to_html(), '<div><b>same</b></div>'
+            )
+
+        self.assertEqual(Card.render_cache().stats(), {'hits': 0, 'misses': 5, 'entries': 0})
+
+    def test_equal_values_of_other_types(self):
+
+        class Flag(PureComponent):
+
+            def render(self):
+                return Elem('i', {}, self.props['on'])
+
+        self.assertEqual(
+            [Elem(Flag, {'on': value}).to_html() for value in (1, True, 1.0)],
+            ['<i>1</i>', '<i>True</i>', '<i>1.0</i>'],
+        )
+
+    def test_cache_per_class(self):
+
+        class Badge(Icon):
+            pass
+
+        self.assertIsNot(Badge.render_cache(), Icon.render_cache())
@@ -0,0 +1,135 @@
+
+from __future__ import unicode_literals, print_function
+
+from unittest import TestCase
+
+from packed import Elem, packed
+
+
+class TestFragmentCache(TestCase):
+
+    def setUp(self):
+        self.calls = []
+
+    def nav(self, section, user=None):
+        self.calls.append((section, user))
+        return Elem('nav', {'class': section})
+
+    def test_cached(self):
+
+        nav = packed(cache=True)(self.nav)
+
+        self.assertEqual(nav('home'), '<nav class="home"></nav>')
+        self.assertEqual(nav(section='home'), '<nav class="home"></nav>')
+        self.assertEqual(nav('about'), '<nav class="about"></nav>')
+
+        self.assertEqual(self.calls, [('home', None), ('about', None)])
+        self.assertEqual(nav.render_cache.stats(), {'hits': 1, 'misses': 2, 'entries': 2})
+
+    def test_chosen_arguments(self):
+
+        nav = packed(cache=['section'])(self.nav)
+
+        nav('home', 'alice')
+        nav('home', user='bob')
+
+        self.assertEqual(self.calls, [('home', 'alice')])
+
+    def test_key_function(self):
+
+        nav = packed(cache=lambda section, user=None: section.lower())(self.nav)
+
+        nav('home')
+        nav('HOME')
+
+        self.assertEqual(len(self.calls), 1)
+
+    def test_ttl(self):
+
+        now = [0]
+        nav = packed(cache=True, ttl=60)(self.nav)
+        nav.render_cache.timer = lambda: now[0]
+
+        nav('home')
+        now[0] = 59
+        nav('home')
+        now[0] = 61
+        nav('home')
+
+        self.assertEqual(len(self.calls), 2)
+
+    def test_cache_size(self):
+
+        nav = packed(cache=True, cache_size=1)(self.nav)
+
+        nav('home')
+        nav('about')
+        nav('home')
+
+        self.assertEqual(len(self.calls), 3)
+        self.assertEqual(nav.render_cache.stats()['entries'], 1)
+
+    def test_invalidate(self):
+
+        nav = packed(cache=True)(self.nav)
+
+        nav('home')
+        self.assertTrue(nav.invalidate('home'))
+        self.assertFalse(nav.invalidate('home'))
+        nav('home')
+
+        self.assertEqual(len(self.calls), 2)
+
+    def test_unhashable_arguments(self):
+
+        nav = packed(cache=True)(self.nav)
+
+        nav(['home'])
+        nav(['home'])
+
+        self.assertEqual(len(self.calls), 2)
+        self.assertEqual(nav.render_cache.stats()['entries'], 0)
+
+    def test_default_arguments(self):
+
+        def nav(lang='en'):
+            self.calls.append(lang)
+            return Elem('nav', {'lang': lang})
+
+        nav = packed(cache=['lang'])(nav)
+
+        self.assertEqual(nav(), '<nav lang="en"></nav>')
+        self.assertEqual(nav(lang=None), '<nav lang="None"></nav>')
+        self.assertEqual(nav('en'), '<nav lang="en"></nav>')
+        self.assertEqual(self.calls, ['en', None])
+
+    def test_single_argument_name(self):
+
+        nav = packed(cache='section')(self.nav)
+
+        nav('home', 'alice')
+        nav('about', 'alice')
+        nav('home', 'bob')
+
+        self.assertEqual(self.calls, [('home', 'alice'), ('about', 'alice')])
+
+    def test_unknown_argument_name(self):
+
+        def nav(language):
+            return Elem('p', {}, language)
+
+        with self.assertRaises(TypeError):
+            packed(cache=['lang'])(nav)
+
+    def test_keyword_arguments(self):
+
+        def page(**kwargs):
+            self.calls.append(kwargs)
+            return Elem('p', {}, kwargs.get('page'))
+
+        page = packed(cache='page')(page)
+
+        self.assertEqual(page(page=1, user='alice'), '<p>1</p>')
+        self.assertEqual(page(page=2, user='alice'), '<p>2</p>')
+        self.assertEqual(page(page=1, user='bob'), '<p>1</p>')
+        self.assertEqual(len(self.calls), 2)
@@ -55,3 +55,43 @@ class TestElem(TestCase):
         expected = "<a>My link text</a>"
 
         self.assertEqual(elem.to_html(), expected)
+
+    def test_deep_tree(self):
+
+        elem = Elem('b')
+        for level in range(10000):
+            elem = Elem('i', {}, [elem])
+
+        expected = '<i>' * 10000 + '<b></b>' + '</i>' * 10000
+
+        self.assertEqual(elem.to_html(), expected)
+
+    def test_subclass_to_html(self):
+
+        class Comment(Elem):
+
+            def to_html(self):
+                return '<!-- {} -->'.format(self.name)
+
+        elem = Elem('a', {}, Comment('note'), 'text')
+
+        expected = "<a><!-- note -->text</a>"
+
+        self.assertEqual(elem.to_html(), expected)
+
+    def test_shared_empty_attributes(self):
+
+        first = Elem('a')
+        second = Elem('b', {})
+
+        self.assertIs(first.attributes, second.attributes)
+        with self.assertRaises(TypeError):
+            first.attributes['class'] = 'icon'
+        self.assertEqual(Elem('a', {'class': 'icon'}).to_html(), '<a class="icon"></a>')
+
+    def test_compact(self):
+
+        elem = Elem(''.join(['d', 'i', 'v']))
+
+        self.assertFalse(hasattr(elem, '__dict__'))
+        self.assertIs(elem.name, Elem('div').name)
@@ -0,0 +1,89 @@
+
+from __future__ import unicode_literals, print_function
+
+from unittest import TestCase
+
+from packed import translate, escape, to_html, Elem, Markup, Component
+
+
+class SafeString(unicode):
+
+    def __html__(self):
+        return self
+
+
+class TestEscape(TestCase):
+
+    def test_escape(self):
+
+        self.assertEqual(escape('<a href="x">Tom & Jerry\'s</a>'),
+                         '&lt;a href=&#34;x&#34;&gt;Tom &amp; Jerry&#39;s&lt;/a&gt;')
+        self.assertEqual(escape('plain'), 'plain')
+        self.assertEqual(escape(3), '3')
+
+    def test_safe(self):
+
+        self.assertIs(type(escape(Markup('<b>'))), Markup)
+        self.assertEqual(escape(SafeString('<b>')), '<b>')
+
+    def test_text_children(self):
+
+        elem = Elem('p', {}, '<script>', Markup('<b>bold</b>'), SafeString('<i>'), 1)
+
+        self.assertEqual(elem.to_html(), '<p>&lt;script&gt;<b>bold</b><i>1</p>')
+
+    def test_attributes(self):
+
+        elem = Elem('a', {'title': '"quoted" & <b>'})
+
+        self.assertEqual(elem.to_html(), '<a title="&#34;quoted&#34; &amp; &lt;b&gt;"></a>')
+
+    def test_component(self):
+
+        class Name(Component):
+
+            def render(self):
+                return self.props['name']
+
+        self.assertEqual(Elem(Name, {'name': 'A & B'}).to_html(), 'A &amp; B')
+
+
+class TestTranslatedEscape(TestCase):
+
+    code = """
+def render(name, link):
+    return <p title="Tom &amp; Jerry">It's &copy; <a href={link}>{name}</a> &gt; here</p>
+"""
+
+    expected = (
+        '<p title="Tom &amp; Jerry">It\'s &copy; <a href="/?a=1&amp;b=&#34;2&#34;">'
+        '&lt;Tom&gt;</a> &gt; here</p>'
+    )
+
+    def render(self, **options):
+        namespace = {'Elem': Elem, 'Markup': Markup, 'to_html': to_html}
+        exec(translate(self.code, **options), namespace)
+        return to_html(namespace['render']('<Tom>', '/?a=1&b="2"'))
+
+    def test_elem(self):
+
+        self.assertEqual(self.render(), self.expected)
+
+    def test_prerender(self):
+
+        self.assertEqual(self.render(prerender=True), self.expected)
+
+    def test_string_backend(self):
+
+        self.assertEqual(self.render(backend='string'), self.expected)
+
+    def test_elem_import_only(self):
+
+        namespace = {'Elem': Elem}
+        exec(translate('def link():\n    return <a href="/?a=1&b=2">Don\'t</a>\n'), namespace)
+
+        self.assertEqual(to_html(namespace['link']()), '<a href="/?a=1&b=2">Don\'t</a>')
+
+    def test_plain_text_literal(self):
+
+        self.assertIn("'Just text'", translate('    return <p>Just text</p>\n'))
@@ -0,0 +1,118 @@
+
+from __future__ import unicode_literals, print_function
+
+import sys
+import traceback
+from unittest import TestCase
+
+from packed import translate, translate_ast, translate_stream, compile_code, Elem, to_html
+
+
+code = """
+@packed
+def link(url):
+    return <p class="link"><a class="btn" href="/home">Home</a> <a href={url}>Here</a></p>
+
+
+def fail():
+    raise ValueError('fail')
+"""
+
+
+class TestHoist(TestCase):
+
+    def test_constants(self):
+
+        expected = """
+_packed_attributes_b91fd1653f02 = {
+    'class': 'link',
+}
+_packed_elem_aaa42bfb66d2 = Elem(
+    'a',
+    {
+        'class': 'btn',
+        'href': '/home',
+    },
+    'Home',
+)
+
+
+@packed
+def link(url):
+    return Elem(
+        'p',
+        _packed_attributes_b91fd1653f02,
+        _packed_elem_aaa42bfb66d2,
+        ' ',
+        Elem(
+            'a',
+            {
+                'href': url,
+            },
+            'Here',
+        ),
+    )
+
+
+def fail():
+    raise ValueError('fail')
+"""
+
+        self.assertMultiLineEqual(translate(code, hoist=True), expected)
+
+    def test_shared_elem(self):
+
+        namespace = {'Elem': Elem}
+        exec(translate('def home():\n    return <a href="/">Home</a>\n', hoist=True), namespace)
+
+        self.assertIs(namespace['home'](), namespace['home']())
+        self.assertEqual(to_html(namespace['home']()), '<a href="/">Home</a>')
+
+    def test_top_level(self):
+
+        namespace = {'Elem': Elem}
+        exec(translate('if True:\n    page = <p>Text</p>\nelse:\n    page = None\n', hoist=True),
+             namespace)
+
+        self.assertEqual(to_html(namespace['page']), '<p>Text</p>')
+
+    def test_line_numbers(self):
+
+        tree = translate_ast(code, hoist=True)
+
+        self.assertEqual([node.lineno for node in tree.body[:2]], [2, 2])
+        self.assertEqual(tree.body[-1].lineno, 7)
+
+        namespace = {'Elem': Elem, 'packed': lambda func: func}
+        exec(compile_code(code, 'hoist.pyx', hoist=True), namespace)
+        try:
+            namespace['fail']()
+        except ValueError:
+            self.assertEqual(traceback.extract_tb(sys.exc_info()[2])[-1][1], 8)
+        else:
+            self.fail('ValueError not raised')
+
+    def test_stream(self):
+
+        # Each block repeats a tag from an earlier one, whose constant isn't defined again
+        source = code + code.replace('def link', 'def other_link').replace('def fail', 'def other')
+        chunks = [line + '\n' for line in source.split('\n')]
+        expected = translate(''.join(chunks), hoist=True)
+
+        for block_size in (1, 64, 1024):
+            self.assertMultiLineEqual(
+                ''.join(translate_stream(chunks, block_size=block_size, hoist=True)), expected
+            )
+
+    def test_comment_ending_in_comma(self):
+
+        source = (
+            'from packed import Elem\n'
+            '# Renders the header, footer,\n'
+            'def header():\n'
+            '    return <div class="x">Header</div>\n'
+        )
+        namespace = {}
+        exec(translate(source, hoist=True), namespace)
+
+        self.assertEqual(to_html(namespace['header']()), '<div class="x">Header</div>')
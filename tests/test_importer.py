@@ -0,0 +1,129 @@
+
+from __future__ import unicode_literals, print_function
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from unittest import TestCase
+
+from packed import install_importer, uninstall_importer, translator
+
+
+module_source = """
+from packed import Elem, packed
+
+
+@packed
+def link(url):
+    return <a href={url}>Link</a>
+"""
+
+
+class TestImporter(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        open(os.path.join(self.directory, 'packed_example.pyx'), 'w').write(module_source)
+        os.mkdir(os.path.join(self.directory, 'packed_package'))
+        open(os.path.join(self.directory, 'packed_package', '__init__.pyx'), 'w').write(
+            module_source
+        )
+        sys.path.insert(0, self.directory)
+        install_importer()
+
+    def tearDown(self):
+        uninstall_importer()
+        sys.path.remove(self.directory)
+        sys.modules.pop('packed_example', None)
+        sys.modules.pop('packed_package', None)
+        sys.modules.pop('packed_shadowed', None)
+        shutil.rmtree(self.directory)
+
+    def write(self, directory, filename, contents):
+        open(os.path.join(directory, filename), 'w').write(contents)
+
+    def test_import(self):
+
+        import packed_example
+
+        self.assertEqual(packed_example.link('/home'), '<a href="/home">Link</a>')
+        self.assertEqual(
+            packed_example.__file__, os.path.join(self.directory, 'packed_example.pyx')
+        )
+
+    def test_import_package(self):
+
+        import packed_package
+
+        self.assertEqual(packed_package.link('/home'), '<a href="/home">Link</a>')
+        self.assertEqual(packed_package.__path__, [os.path.join(self.directory, 'packed_package')])
+
+    def test_cached_code_skips_translation(self):
+
+        import packed_example  # noqa: F401
+        del sys.modules['packed_example']
+
+        cache_path = os.path.join(self.directory, '__pycache__', 'packed_example.packed.pyc')
+        self.assertTrue(os.path.exists(cache_path))
+
+        def fail(code, filename, **options):
+            raise AssertionError('compile_code should not be called')
+
+        compile_code = translator.compile_code
+        translator.compile_code = fail
+        try:
+            import packed_example  # noqa: F811
+        finally:
+            translator.compile_code = compile_code
+
+        self.assertEqual(packed_example.link('/home'), '<a href="/home">Link</a>')
+
+    def test_cached_code_skips_translator_import(self):
+
+        import packed_example  # noqa: F401
+
+        script = (
+            'import sys, packed; packed.install_importer(); import packed_example; '
+            'print("packed.translator" in sys.modules)'
+        )
+        environment = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+        output = subprocess.check_output([sys.executable, '-c', script], env=environment)
+
+        self.assertEqual(output.strip(), b'False')
+
+    def test_changed_source_is_translated(self):
+
+        import packed_example  # noqa: F401
+        del sys.modules['packed_example']
+
+        open(os.path.join(self.directory, 'packed_example.pyx'), 'w').write(
+            module_source.replace('Link', 'Changed')
+        )
+        import packed_example  # noqa: F811
+
+        self.assertEqual(packed_example.link('/home'), '<a href="/home">Changed</a>')
+
+    def test_path_order(self):
+
+        earlier = tempfile.mkdtemp()
+        self.write(earlier, 'packed_shadowed.py', 'source = "py"\n')
+        self.write(self.directory, 'packed_shadowed.pyx', 'source = "pyx"\n')
+        sys.path.insert(0, earlier)
+        try:
+            import packed_shadowed
+        finally:
+            sys.path.remove(earlier)
+            shutil.rmtree(earlier)
+
+        self.assertEqual(packed_shadowed.source, 'py')
+
+    def test_module_next_to_cython_source(self):
+
+        self.write(self.directory, 'packed_shadowed.py', 'source = "py"\n')
+        self.write(self.directory, 'packed_shadowed.pyx', 'cdef int x = 1\n')
+
+        import packed_shadowed
+
+        self.assertEqual(packed_shadowed.source, 'py')
@@ -0,0 +1,84 @@
+
+from __future__ import unicode_literals, print_function
+
+import io
+from unittest import TestCase
+
+from packed import Elem, Component, Markup, iter_html, render_into, to_html
+
+
+class Row(Component):
+
+    def render(self):
+        return Elem('tr', {}, Elem('td', {}, self.props['value']))
+
+
+page = Elem(
+    'table',
+    {'class': 'items'},
+    [Elem(Row, {'value': index}) for index in range(3)],
+    Markup('<tr><td>end</td></tr>'),
+)
+
+
+class TestIterHtml(TestCase):
+
+    def test_same_html(self):
+
+        self.assertEqual(''.join(iter_html(page)), to_html(page))
+
+    def test_document_order(self):
+
+        self.assertEqual(list(page.iter_html(chunk_size=0)), [
+            '<table class="items">',
+            '<tr>', '<td>', '0', '</td>', '</tr>',
+            '<tr>', '<td>', '1', '</td>', '</tr>',
+            '<tr>', '<td>', '2', '</td>', '</tr>',
+            '<tr><td>end</td></tr>',
+            '</table>',
+        ])
+
+    def test_chunk_size(self):
+
+        chunks = list(iter_html(page, chunk_size=20))
+
+        self.assertEqual(''.join(chunks), to_html(page))
+        self.assertTrue(all(len(chunk) >= 20 for chunk in chunks[:-1]))
+        self.assertEqual(len(chunks), 5)
+
+    def test_lazy(self):
+
+        rendered = []
+
+        class Tracked(Component):
+
+            def render(self):
+                rendered.append(self.props['name'])
+                return self.props['name']
+
+        chunks = iter_html([Elem(Tracked, {'name': 'a'}), Elem(Tracked, {'name': 'b'})], 0)
+
+        self.assertEqual(next(chunks), 'a')
+        self.assertEqual(rendered, ['a'])
+
+    def test_text(self):
+
+        self.assertEqual(list(iter_html('text')), ['text'])
+        self.assertEqual(list(iter_html([])), [])
+
+
+class TestRenderInto(TestCase):
+
+    def test_list(self):
+
+        buffer = ['<!DOCTYPE html>']
+
+        self.assertIs(page.render_into(buffer), buffer)
+        self.assertEqual(''.join(buffer), '<!DOCTYPE html>' + to_html(page))
+
+    def test_file(self):
+
+        buffer = io.StringIO()
+        render_into([page, 'after'], buffer)
+
+        self.assertEqual(buffer.getvalue(), to_html(page) + 'after')
@@ -0,0 +1,94 @@
+
+from __future__ import unicode_literals, print_function
+
+from unittest import TestCase
+
+from packed import translate, to_html, Elem, Markup
+
+
+class TestPrerender(TestCase):
+
+    def test_static_tree(self):
+
+        code = """
+    return <ul class="nav"><li>Home</li> <li>About</li><br /></ul>
+"""
+
+        expected = """
+    return Markup('<ul class="nav"><li>Home</li> <li>About</li><br></br></ul>')
+"""
+
+        result = translate(code, prerender=True)
+
+        self.assertMultiLineEqual(expected, result)
+
+    def test_dynamic_holes(self):
+
+        code = """
+    return <a href={link}><i class="icon" /> {title} <Badge count={count} /></a>
+"""
+
+        expected = """
+    return [
+        Markup('<a href="'),
+        link,
+        Markup('"><i class="icon"></i> '),
+        title,
+        Markup(' '),
+        Elem(
+            Badge,
+            {
+                'count': count,
+            },
+        ),
+        Markup('</a>'),
+    ]
+"""
+
+        result = translate(code, prerender=True)
+
+        self.assertMultiLineEqual(expected, result)
+
+    def test_quoting(self):
+
+        code = """
+    return <p>It's \\\\ done</p>
+"""
+
+        expected = """
+    return Markup('<p>It\\'s \\\\\\\\ done</p>')
+"""
+
+        result = translate(code, prerender=True)
+
+        self.assertMultiLineEqual(expected, result)
+
+    def test_same_html_as_elem(self):
+
+        class Badge(object):
+
+            def __init__(self, count):
+                self.count = count
+
+            def render(self):
+                return Elem('span', {}, self.count)
+
+        code = """
+result = <div class="card"><a href={link}>{title}</a> <Badge count={count} /><p>Static</p></div>
+"""
+        values = {'link': '/home', 'title': 'Home', 'count': 3, 'Badge': Badge}
+
+        elem_namespace = dict(values, Elem=Elem)
+        exec(translate(code), elem_namespace)
+        prerender_namespace = dict(values, Elem=Elem, Markup=Markup)
+        exec(translate(code, prerender=True), prerender_namespace)
+
+        self.assertEqual(
+            to_html(elem_namespace['result']), to_html(prerender_namespace['result'])
+        )
+
+    def test_markup_is_output_as_is(self):
+
+        elem = Elem('div', {}, Markup('<b>Bold</b>'), 'text')
+
+        self.assertEqual(elem.to_html(), '<div><b>Bold</b>text</div>')
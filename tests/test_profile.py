@@ -0,0 +1,97 @@
+
+from __future__ import unicode_literals, print_function
+
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+from unittest import TestCase
+
+from packed import translate
+from packed.translator import Profile, build, main
+
+
+code = """
+def link(url):
+    if a < b:
+        pass
+    return <a href={url}><i class="icon" /> Link</a>
+
+
+def items(values):
+    return <ul>{values}</ul>
+"""
+
+
+class TestProfile(TestCase):
+
+    def test_same_translation(self):
+
+        self.assertEqual(translate(code, profile=Profile()), translate(code))
+
+    def test_rules(self):
+
+        profile = Profile()
+        translate(code, profile=profile)
+        rules = profile.as_dict()['rules']
+
+        self.assertEqual(rules['PackedBlock']['attempts'], 2)
+        self.assertEqual(rules['PairedTag']['attempts'], 2)
+        self.assertEqual(rules['SelfClosingTag']['attempts'], 1)
+        self.assertEqual(rules['Attributes']['attempts'], 3)
+        self.assertEqual(rules['InlineCode']['attempts'], 1)
+        self.assertEqual(rules['Text']['attempts'], 1)
+        # The closing tags are first tried as nested tags
+        self.assertEqual(rules['Tag']['backtracks'], 2)
+
+    def test_slowest_lines(self):
+
+        profile = Profile()
+        translate(code, profile=profile)
+        lines = dict((line['line'], line['text']) for line in profile.as_dict()['slowest_lines'])
+
+        self.assertEqual(lines[5], 'return <a href={url}><i class="icon" /> Link</a>')
+        self.assertEqual(lines[9], 'return <ul>{values}</ul>')
+
+    def test_table(self):
+
+        profile = Profile()
+        translate(code, profile=profile)
+
+        self.assertIn('PackedBlock', profile.table())
+
+
+class TestProfileBuild(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        open(os.path.join(self.directory, 'example.pyx'), 'w').write(code)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_files(self):
+
+        profile = Profile()
+        build(self.directory, jobs=2, profile=profile)
+        files = profile.as_dict()['files']
+
+        self.assertEqual(len(files), 1)
+        self.assertEqual(files[0]['filename'], os.path.join(self.directory, 'example.pyx'))
+        self.assertEqual(files[0]['lines'], 9)
+
+    def test_main_json(self):
+
+        path = os.path.join(self.directory, 'profile.json')
+        stdout = sys.stdout
+        sys.stdout = io.StringIO()
+        try:
+            self.assertEqual(main([self.directory, '--profile', '--profile-json', path]), 0)
+            output = sys.stdout.getvalue()
+        finally:
+            sys.stdout = stdout
+
+        self.assertIn('Slowest lines', output)
+        self.assertEqual(json.load(open(path))['files'][0]['lines'], 9)
@@ -0,0 +1,26 @@
+
+from __future__ import unicode_literals, print_function
+
+import subprocess
+import sys
+from unittest import TestCase
+
+
+class TestRuntimeImport(TestCase):
+
+    def test_translator_is_not_imported(self):
+
+        code = (
+            "import sys, packed; "
+            "print(sorted(set(['pypeg2', 'packed.translator']) & set(sys.modules)))"
+        )
+        output = subprocess.check_output([sys.executable, '-c', code])
+
+        self.assertEqual(output.decode('utf-8').strip(), '[]')
+
+    def test_translator_is_imported_when_needed(self):
+
+        code = "import sys, packed; packed.translate(''); print('pypeg2' in sys.modules)"
+        output = subprocess.check_output([sys.executable, '-c', code])
+
+        self.assertEqual(output.decode('utf-8').strip(), 'True')
@@ -0,0 +1,110 @@
+
+from __future__ import unicode_literals, print_function
+
+import warnings
+from unittest import TestCase
+
+from pypeg2 import parse, compose
+
+from packed import translate
+from packed.translator import CodeBlock, Scanner
+
+
+def reference_translate(code):
+    """Translates using the original pypeg2 grammar"""
+    return compose(parse(code, CodeBlock, whitespace=None))
+
+
+def scanner_translate(code):
+    """Translates using the scanner's equivalent of the original grammar"""
+    scanner = Scanner(code)
+    return scanner.parse().compose(scanner)
+
+
+class TestScannerEquivalence(TestCase):
+
+    samples = [
+        "",
+        "\n",
+        "   ",
+        "return True",
+        "    return True # <a attr=\"value\"></a>\n",
+        "<a></a>\n",
+        "    return <a></a>\n",
+        "    return <a />",
+        "    return <a/>\n",
+        "    return <a >\n",
+        "    return <a><i></i></a>\n",
+        "    return <a href={share}><i class=\"fa fa-twitter\" /></a>\n",
+        "    return <a> <i></i> <b></b> </a>\n",
+        "    return <a href={link}>\n        <i></i>\n        <b>Text</b>\n    </a>\n",
+        "    return <p>My paragraph with {target} and {another}</p>\n",
+        "    return <p>   leading and trailing   </p>\n",
+        "    return <Component prop={value} other=\"text\" />\n",
+        "    return <Component>child</Component>\n",
+        "    return <a><b></b><ExampleComponent /></a>\n",
+        "    items = (<a />, <b />, <c></c>)\n",
+        "    x = <a></a><b></b>\n",
+        "    return <a><b></a>\n",
+        "    return <a></b>\n",
+        "    return <a>\n        <b>\n    </a>\n    y = <c></c>\n",
+        "    if a < b and c > d:\n        return <a>{a < b}</a>\n",
+        "    return <a>unclosed {brace</a>\n",
+        "    return <a>text</a> # <b></b>\n",
+        "    return <_private /> + <Upper />\n",
+        "\n\n    return <a></a>\n\n",
+    ]
+
+    def test_samples(self):
+
+        for code in self.samples:
+            self.assertMultiLineEqual(reference_translate(code), scanner_translate(code))
+
+    def test_repeated_lines(self):
+
+        code = "    return <ul>{items}</ul>\n    value = compute(x)\n" * 50
+
+        self.assertMultiLineEqual(reference_translate(code), scanner_translate(code))
+
+
+class TestScannerDepth(TestCase):
+
+    depth = 10000
+
+    def test_deep_nesting(self):
+
+        code = "    return " + "<a>" * self.depth + "text" + "</a>" * self.depth + "\n"
+
+        result = translate(code)
+
+        self.assertEqual(result.count("Elem("), self.depth)
+        self.assertIn("'text'", result)
+
+    def test_deep_nesting_options(self):
+
+        code = "x = " + "<a>" * self.depth + "{y}" + "</a>" * self.depth + "\n"
+
+        for options in ({'prerender': True}, {'backend': 'string'}, {'coalesce': True},
+                        {'hoist': True}):
+            result = translate(code, **options)
+            self.assertIn('y', result)
+
+        # Without inline code the whole tree is static and hoisted as one constant
+        static = "x = " + "<a>" * self.depth + "text" + "</a>" * self.depth + "\n"
+        self.assertEqual(translate(static, hoist=True).count("Elem("), self.depth)
+
+
+class TestScannerBytes(TestCase):
+
+    def test_non_ascii_without_warnings(self):
+
+        code = b'# caf\xc3\xa9,\nreturn <a>\xc3\xa9</a>\n'
+
+        for options in ({}, {'hoist': True}):
+            with warnings.catch_warnings(record=True) as caught:
+                warnings.simplefilter('always')
+                # Bytes which can't be decoded make the translation fail, as in tests/test_build.py
+                with self.assertRaises(UnicodeError):
+                    translate(code, **options)
+
+            self.assertEqual([str(warning.message) for warning in caught], [])
@@ -0,0 +1,90 @@
+
+from __future__ import unicode_literals, print_function
+
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+from packed import translate, translate_stream
+from packed.translator import convert_file
+
+
+code = """# packed: backend=string
+def link(url):
+    text = '''<b>
+    </b>'''
+    return <a href={url}>
+        <i>{text}</i>
+    </a>
+
+
+@packed(backend='elem')
+def item(value):
+    if value < 0:
+        return <li class="negative">{value}</li>  # <b>
+    return <li>{value}</li>
+"""
+
+
+class TestTranslateStream(TestCase):
+
+    def test_matches_translate(self):
+
+        lines = code.splitlines(True)
+        for block_size in [1, 10, 100, 10000]:
+            result = ''.join(translate_stream(iter(lines), block_size=block_size))
+            self.assertMultiLineEqual(result, translate(code))
+
+    def test_split_within_lines(self):
+
+        result = ''.join(translate_stream(iter(code), block_size=5))
+
+        self.assertMultiLineEqual(result, translate(code))
+
+    def test_yields_before_the_end(self):
+
+        def lines():
+            yield "x = 1\n"
+            yield "y = 2\n"
+            raise AssertionError('Read past the first lines')
+
+        chunks = translate_stream(lines(), block_size=1)
+
+        self.assertEqual(next(chunks), "x = 1\n")
+        self.assertEqual(next(chunks), "y = 2\n")
+
+    def test_incomplete_tag(self):
+
+        result = ''.join(translate_stream(iter(["return <a>\n"]), block_size=1))
+
+        self.assertEqual(result, translate("return <a>\n"))
+
+
+class TestStreamingTranslateFile(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.pyx_path = os.path.join(self.directory, 'example.pyx')
+        self.py_path = os.path.join(self.directory, 'example.py')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_no_temporary_files(self):
+
+        open(self.pyx_path, 'w').write(code)
+
+        self.assertIsNone(convert_file(self.pyx_path, self.py_path))
+        self.assertEqual(open(self.py_path).read(), translate(code))
+        self.assertEqual(sorted(os.listdir(self.directory)), ['example.py', 'example.pyx'])
+
+    def test_failure_leaves_output(self):
+
+        open(self.pyx_path, 'w').write(code)
+        convert_file(self.pyx_path, self.py_path)
+        open(self.pyx_path, 'wb').write(b'return <a>\xe9</a>\n')
+
+        self.assertIsNotNone(convert_file(self.pyx_path, self.py_path))
+        self.assertEqual(open(self.py_path).read(), translate(code))
+        self.assertEqual(sorted(os.listdir(self.directory)), ['example.py', 'example.pyx'])
@@ -402,3 +402,64 @@ class TestComponentTranslate(TestCase):
         result = translate(code)
 
         self.assertMultiLineEqual(expected, result)
+
+    def test_tag_in_string(self):
+
+        code = """
+    link = "<a href='/'>Home</a>"
+    other = '''<b>
+        {not_code}
+    </b>'''
+    return <a>{link}</a>
+"""
+
+        expected = """
+    link = "<a href='/'>Home</a>"
+    other = '''<b>
+        {not_code}
+    </b>'''
+    return Elem(
+        'a',
+        {},
+        link,
+    )
+"""
+
+        result = translate(code)
+
+        self.assertMultiLineEqual(expected, result)
+
+    def test_comparison(self):
+
+        code = """
+    if count <limit and limit> 0:
+        return items[0] <b
+"""
+
+        expected = code
+
+        result = translate(code)
+
+        self.assertMultiLineEqual(expected, result)
+
+    def test_tag_after_comment(self):
+
+        code = """
+    return (  # <b></b>
+        <a>Text</a>
+    )
+"""
+
+        expected = """
+    return (  # <b></b>
+        Elem(
+            'a',
+            {},
+            'Text',
+        )
+    )
+"""
+
+        result = translate(code)
+
+        self.assertMultiLineEqual(expected, result)
@@ -0,0 +1,131 @@
+
+from __future__ import unicode_literals, print_function
+
+import io
+import os
+import shutil
+import sys
+import tempfile
+from unittest import TestCase, skipUnless
+
+from packed import translator
+from packed.translator import (
+    BuildManifest, BuildReport, InotifyWatcher, PollingWatcher, main, rebuild_files
+)
+
+
+class WatcherTests(object):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.write('existing.pyx', 'return <a></a>\n')
+        os.mkdir(self.path('nested'))
+        self.watcher = self.create_watcher()
+
+    def tearDown(self):
+        self.watcher.close()
+        shutil.rmtree(self.directory)
+
+    def path(self, *parts):
+        return os.path.join(self.directory, *parts)
+
+    def write(self, filename, contents):
+        open(self.path(filename), 'w').write(contents)
+
+    def test_new_file(self):
+
+        self.write(os.path.join('nested', 'new.pyx'), 'return <b></b>\n')
+
+        self.assertEqual(self.watcher.changes(), set([self.path('nested', 'new.pyx')]))
+
+    def test_changed_and_removed_files(self):
+
+        self.write('existing.pyx', 'return <b></b>\n<c></c>\n')
+        self.write('ignored.py', 'ignored = True\n')
+        os.remove(self.path('existing.pyx'))
+
+        self.assertEqual(self.watcher.changes(), set([self.path('existing.pyx')]))
+
+
+class TestPollingWatcher(WatcherTests, TestCase):
+
+    def create_watcher(self):
+        return PollingWatcher(self.directory, interval=0.01)
+
+
+@skipUnless(sys.platform.startswith('linux'), 'inotify is only available on Linux')
+class TestInotifyWatcher(WatcherTests, TestCase):
+
+    def create_watcher(self):
+        return InotifyWatcher(self.directory)
+
+    def test_new_directory(self):
+
+        os.mkdir(self.path('created'))
+        self.write(os.path.join('created', 'new.pyx'), 'return <b></b>\n')
+
+        self.assertIn(self.path('created', 'new.pyx'), self.watcher.changes())
+
+
+class TestRebuildFiles(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.manifest = BuildManifest(os.path.join(self.directory, '.packed-manifest.json'))
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_translate_and_remove(self):
+
+        pyx_path = os.path.join(self.directory, 'example.pyx')
+        py_path = os.path.join(self.directory, 'example.py')
+        open(pyx_path, 'w').write('return <a></a>\n')
+
+        report = rebuild_files(self.directory, [pyx_path], self.manifest)
+
+        self.assertEqual(report.translated, 1)
+        self.assertEqual(open(py_path).read(), "return Elem('a')\n")
+        self.assertIn('example.pyx', self.manifest.entries)
+
+        os.remove(pyx_path)
+        report = rebuild_files(self.directory, [pyx_path], self.manifest)
+
+        self.assertEqual(report.removed, 1)
+        self.assertFalse(os.path.exists(py_path))
+        self.assertNotIn('example.pyx', self.manifest.entries)
+
+
+class TestMainWatch(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.build, self.watch = translator.build, translator.watch
+
+    def tearDown(self):
+        translator.build, translator.watch = self.build, self.watch
+        shutil.rmtree(self.directory)
+
+    def test_edit_during_build(self):
+
+        pyx_path = os.path.join(self.directory, 'edited.pyx')
+        seen = []
+
+        def build(*args):
+            # An edit made while the initial build is running
+            open(pyx_path, 'w').write('return <a></a>\n')
+            return BuildReport()
+
+        def watch(directory, cache, watcher, options):
+            seen.extend(watcher.changes())
+            watcher.close()
+
+        translator.build, translator.watch = build, watch
+        stdout = sys.stdout
+        sys.stdout = io.StringIO()
+        try:
+            self.assertEqual(main([self.directory, '--no-cache', '--watch']), 0)
+        finally:
+            sys.stdout = stdout
+
+        self.assertEqual(seen, [pyx_path])